@@ -2,10 +2,23 @@ import os
 import requests
 from bs4 import BeautifulSoup
 import csv
+import logging
+import sys
 from datetime import datetime
 
+# log.py lives with the finalized scrapers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "finalized code"))
+from log import get_logger
+
 BASE_URL = "https://www.thecountyrecorder.com"
 
+# One logger per stage, set up by log.py. Page dumps and per-row output are DEBUG
+# messages; enable them with SCRAPER_LOG_LEVEL=DEBUG when inspecting the pages
+bootstrap_log = get_logger("bootstrap")
+search_log = get_logger("search")
+results_log = get_logger("results")
+image_log = get_logger("image")
+
 # Function to select state
 def select_state(session, state):
     response = session.get(BASE_URL)
@@ -26,7 +39,7 @@ def select_state(session, state):
                 break
 
         if not state_value:
-            print(f"State '{state}' not found!")
+            bootstrap_log.warning(f"State '{state}' not found!")
             return False
 
         form_data = {
@@ -38,10 +51,10 @@ def select_state(session, state):
 
         post_response = session.post(BASE_URL, data=form_data)
         if post_response.status_code == 200:
-            print(f"State '{state}' selected successfully.")
+            bootstrap_log.debug(f"State '{state}' selected successfully.")
             return True
         else:
-            print("Failed to select state.")
+            bootstrap_log.error("Failed to select state.")
             return False
     return False
 
@@ -65,7 +78,7 @@ def select_county(session, county):
                 break
 
         if not county_value:
-            print(f"County '{county}' not found!")
+            bootstrap_log.warning(f"County '{county}' not found!")
             return False
 
         form_data = {
@@ -77,10 +90,10 @@ def select_county(session, county):
 
         post_response = session.post(BASE_URL, data=form_data)
         if post_response.status_code == 200:
-            print(f"County '{county}' selected successfully.")
+            bootstrap_log.debug(f"County '{county}' selected successfully.")
             return True
         else:
-            print("Failed to select county.")
+            bootstrap_log.error("Failed to select county.")
             return False
     return False
 
@@ -100,19 +113,19 @@ def accept_disclaimer(session):
 
         post_response = session.post(f"{BASE_URL}{form_action}", data=form_data)
         if post_response.status_code == 200:
-            print("Disclaimer accepted. Redirecting to search page...")
+            bootstrap_log.debug("Disclaimer accepted. Redirecting to search page...")
             
             # After accepting the disclaimer, we now follow the search link.
             search_url = f"{BASE_URL}/Search.aspx"
             response = session.get(search_url)
             if response.status_code == 200:
-                print("Search page loaded successfully.")
+                bootstrap_log.debug("Search page loaded successfully.")
                 return response.text
             else:
-                print("Failed to load search page.")
+                bootstrap_log.error("Failed to load search page.")
                 return None
         else:
-            print("Failed to accept disclaimer.")
+            bootstrap_log.error("Failed to accept disclaimer.")
             return None
     return None
 
@@ -126,8 +139,8 @@ def select_document_group(session):
         soup = BeautifulSoup(response.text, 'html.parser')
 
         # Debugging: Print out the entire page content to inspect the form and dropdown
-        print("Page content to inspect for Document Group dropdown:")
-        print(soup.prettify())
+        if search_log.isEnabledFor(logging.DEBUG):
+            search_log.debug("Page content to inspect for Document Group dropdown:\n%s", soup.prettify())
 
         # Extract hidden fields for form submission
         viewstate = soup.find("input", {"name": "__VIEWSTATE"})["value"]
@@ -137,7 +150,7 @@ def select_document_group(session):
         document_group_dropdown = soup.find("select", {"id": "MainContent_searchMainContent_ctl00_cboDocumentGroup"})
         
         if document_group_dropdown:
-            print("Document group dropdown found.")
+            search_log.debug("Document group dropdown found.")
             # Ensure we send the correct document group value (Lien)
             document_group_value = None
             for option in document_group_dropdown.find_all("option"):
@@ -146,7 +159,7 @@ def select_document_group(session):
                     break
 
             if not document_group_value:
-                print("Document Group 'Lien' not found!")
+                search_log.warning("Document Group 'Lien' not found!")
                 return False
 
             # Form data to submit with selected document group
@@ -160,19 +173,19 @@ def select_document_group(session):
             # Submit the form with the selected document group
             post_response = session.post(BASE_URL, data=form_data)
             if post_response.status_code == 200:
-                print("Document Group 'Lien' selected successfully.")
+                search_log.debug("Document Group 'Lien' selected successfully.")
                 return True
             else:
-                print("Failed to select Document Group 'Lien'.")
+                search_log.error("Failed to select Document Group 'Lien'.")
                 return False
         else:
-            print("Document Group dropdown not found on the page.")
+            search_log.warning("Document Group dropdown not found on the page.")
             return False
     return False
 
 # Function to parse results and download files
 def get_results_and_download(soup, output_folder, start_date, end_date):
-    print("Parsing search results...")
+    results_log.info("Parsing search results...")
 
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
@@ -180,29 +193,31 @@ def get_results_and_download(soup, output_folder, start_date, end_date):
     # Find the parent table with id="tableMain"
     parent_table = soup.find("table", id="tableMain")
     if parent_table:
-        print("Parent table found")
+        results_log.debug("Parent table found")
 
         # Find the td with id="tableMain_Content"
         table_content = parent_table.find("td", id="tableMain_Content")
         if table_content:
-            print("Found tableMain_Content td")
+            results_log.debug("Found tableMain_Content td")
 
             # Find the div with class "main" inside tableMain_Content
             main_div = table_content.find("div", class_="main")
             if main_div:
-                print("Found div.main")
-                print(main_div.prettify())  # Debug: Print out div.main content
+                results_log.debug("Found div.main")
+                if results_log.isEnabledFor(logging.DEBUG):
+                    results_log.debug("div.main content:\n%s", main_div.prettify())
 
                 # Find the 'PrintResults' div inside div.main
                 print_results_div = main_div.find("div", id="PrintResults")
                 if print_results_div:
-                    print("Found PrintResults div")
-                    print(print_results_div.prettify())  # Debug: Print out PrintResults content
+                    results_log.debug("Found PrintResults div")
+                    if results_log.isEnabledFor(logging.DEBUG):
+                        results_log.debug("PrintResults content:\n%s", print_results_div.prettify())
 
                     # Now find the results table within the PrintResults div
                     results_table = print_results_div.find("table", class_="Results")
                     if results_table:
-                        print("Found results table")
+                        results_log.debug("Found results table")
                         rows = results_table.find_all("tr", class_=["results-data-row", "results-data-row listitem-background-color2", "results-data-row listitem-background-color1"])
                         
                         with open(f"{output_folder}/search_results.csv", mode='w', newline='', encoding='utf-8') as file:
@@ -221,21 +236,21 @@ def get_results_and_download(soup, output_folder, start_date, end_date):
                                 try:
                                     record_date_obj = datetime.strptime(recording_date, "%m-%d-%Y %I:%M:%S %p")
                                 except ValueError:
-                                    print(f"Skipping invalid date: {recording_date}")
+                                    results_log.warning(f"Skipping invalid date: {recording_date}")
                                     continue
 
                                 if start_date <= record_date_obj <= end_date:
                                     writer.writerow([item_number, document_id, recording_date, document_type, document_name, name_type])
-                                    print(f"Extracted: {item_number}, {document_id}, {recording_date}, {document_type}, {document_name}, {name_type}")
+                                    results_log.debug("Extracted: %s, %s, %s, %s, %s, %s", item_number, document_id, recording_date, document_type, document_name, name_type)
                                     download_files(document_id, output_folder)
                     else:
-                        print("Results table not found inside PrintResults div.")
+                        results_log.warning("Results table not found inside PrintResults div.")
                 else:
-                    print("PrintResults div not found inside div.main.")
+                    results_log.warning("PrintResults div not found inside div.main.")
             else:
-                print("div.main not found inside tableMain_Content.")
+                results_log.warning("div.main not found inside tableMain_Content.")
         else:
-            print("tableMain_Content td not found.")
+            results_log.warning("tableMain_Content td not found.")
    
 
 # Function to download files
@@ -250,9 +265,9 @@ def download_files(document_id, output_folder):
         file_name = os.path.join(output_folder, f"{document_id}.pdf")
         with open(file_name, 'wb') as file:
             file.write(response.content)
-        print(f"Downloaded {file_name}")
+        image_log.debug("Downloaded %s", file_name)
     else:
-        print(f"Failed to download {file_url}")
+        image_log.warning(f"Failed to download {file_url}")
 
 # Main scraping function
 def scrape(state, county, start_date, end_date, output_folder):
@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+
+from parsers import available_backends, make_soup
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Checked-in pages saved from the live sites
+FIXTURES = ["search_results.html", "samirdebug.html", "samir.html"]
+
+
+# The lookups the scrapers run on these pages: results rows and their cells
+# (extract_results_and_download), hidden inputs and clickable rows (EagleWeb flow)
+def run_queries(soup):
+    for row in soup.find_all("tr", class_=["results-data-row", "results-data-row listitem-background-color2", "results-data-row listitem-background-color1"]):
+        for cell in row.find_all("td"):
+            cell.get_text(strip=True)
+    for row in soup.find_all("tr", {"class": "clickable"}):
+        row.find("a", href=True)
+    for input_tag in soup.find_all("input", {"type": "hidden"}):
+        input_tag.attrs.get("value")
+    for select in soup.find_all("select"):
+        select.find_all("option")
+
+
+def benchmark(markup, backend, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run_queries(make_soup(markup, backend))
+    return (time.perf_counter() - start) / repeat
+
+
+def main(repeat=50):
+    backends = available_backends()
+    print(f"{'fixture':<22}" + "".join(f"{backend:>14}" for backend in backends))
+    for fixture in FIXTURES:
+        with open(os.path.join(REPO_ROOT, fixture), encoding="utf-8") as file:
+            markup = file.read()
+        timings = [benchmark(markup, backend, repeat) for backend in backends]
+        print(f"{fixture:<22}" + "".join(f"{timing * 1000:>12.2f}ms" for timing in timings))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
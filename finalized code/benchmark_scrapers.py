@@ -0,0 +1,191 @@
+import argparse
+import contextlib
+import glob
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # not on Windows; peak RSS is then not reported
+    resource = None
+
+import transport
+from standin_server import LATENCY, start_server
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Date ranges searched in each run (the stand-in server records DOCUMENTS_PER_DAY
+# documents on every day)
+COUNTY_START_DATE = "01-01-2021"
+COUNTY_END_DATE = "01-31-2021"
+
+# Settings of new copy.py for each county recorder mode
+COUNTY_MODES = {
+    "serial": {"STREAM_RESULTS": False, "DETAIL_WORKERS": 1, "IMAGE_DOCUMENT_WORKERS": 1, "IMAGE_WORKERS": 1},
+    "pipeline": {"STREAM_RESULTS": False},
+    "stream": {"STREAM_RESULTS": True},
+    "windows": {"STREAM_RESULTS": True},
+    "async": {},
+}
+MODES = list(COUNTY_MODES) + ["eagleweb"]
+
+
+def load_scraper():
+    spec = importlib.util.spec_from_file_location("new_copy", os.path.join(SCRIPT_DIR, "new copy.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+
+# Runs in a fresh process per mode (so peak RSS belongs to that mode alone), inside an
+# empty working directory. Scraper output is discarded; the result is one JSON line.
+def run_mode(mode, county_url, eagleweb_url):
+    latencies = []
+
+    def record_latency(response, *args, **kwargs):
+        latencies.append(response.elapsed.total_seconds())
+
+    def instrumented(create_session):
+        def create(*args, **kwargs):
+            session = create_session(*args, **kwargs)
+            session.hooks["response"].append(record_latency)
+            return session
+        return create
+
+    # The async engine's aiohttp requests bypass the requests hooks: a TraceConfig
+    # times them from sending to the response headers, like response.elapsed
+    def instrumented_client(client_class):
+        import aiohttp
+
+        async def on_request_start(client, context, params):
+            context.started = time.perf_counter()
+
+        async def on_request_end(client, context, params):
+            latencies.append(time.perf_counter() - context.started)
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+
+        def create(*args, **kwargs):
+            kwargs["trace_configs"] = [*kwargs.get("trace_configs", []), trace]
+            return client_class(*args, **kwargs)
+        return create
+
+    # Measure the scraper, not the per-host throttling meant for the live sites
+    transport.RATE_LIMIT = False
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if mode == "eagleweb":
+            import secondproject
+            secondproject.BASE_URL = eagleweb_url
+            secondproject.LOGIN_URL = f"{eagleweb_url}web/loginPOST.jsp"
+            secondproject.SEARCH_URL = f"{eagleweb_url}eagleweb/docSearchPOST.jsp"
+            secondproject.DOCUMENT_URL = f"{eagleweb_url}recorder/eagleweb/viewDoc.jsp"
+            secondproject.session.hooks["response"].append(record_latency)
+            started = time.perf_counter()
+            secondproject.main()
+            elapsed = time.perf_counter() - started
+            pages = len(glob.glob("*.pdf"))
+            documents = pages
+        else:
+            scraper = load_scraper()
+            scraper.BASE_URL = county_url
+            scraper.create_session = instrumented(scraper.create_session)
+            for name, value in COUNTY_MODES[mode].items():
+                setattr(scraper, name, value)
+            started = time.perf_counter()
+            if mode == "async":
+                scraper.aiohttp.ClientSession = instrumented_client(scraper.aiohttp.ClientSession)
+                scraper.scrape_async("COLORADO", "TELLER", COUNTY_START_DATE, COUNTY_END_DATE, "output")
+            elif mode == "windows":
+                scraper.scrape_windows("COLORADO", "TELLER", COUNTY_START_DATE, COUNTY_END_DATE, "output", max_results=25)
+            else:
+                scraper.scrape("COLORADO", "TELLER", COUNTY_START_DATE, COUNTY_END_DATE, "output")
+            elapsed = time.perf_counter() - started
+            documents = len([path for path in glob.glob(os.path.join("output", "*")) if os.path.isdir(path)])
+            pages = len(glob.glob(os.path.join("output", "*", "*.jpg")))
+
+    return {
+        "mode": mode,
+        "seconds": elapsed,
+        "documents": documents,
+        "pages": pages,
+        "requests": len(latencies),
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_child(mode, server, timeout):
+    with tempfile.TemporaryDirectory() as workdir:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode, "--county-url", server.county_url,
+             "--eagleweb-url", server.eagleweb_url],
+            cwd=workdir, capture_output=True, text=True, timeout=timeout,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [SCRIPT_DIR, os.environ.get("PYTHONPATH")]))},
+        )
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()
+        return {"mode": mode, "error": error[-1] if error else f"exit code {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def format_value(value, pattern):
+    return "-" if value is None else pattern.format(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the scrapers against the local stand-in server")
+    parser.add_argument("modes", nargs="*", default=MODES, help=f"modes to run (default: all of {', '.join(MODES)})")
+    parser.add_argument("--latency", type=float, default=LATENCY, help="seconds the stand-in server adds to every response")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds one mode may run")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--county-url", help=argparse.SUPPRESS)
+    parser.add_argument("--eagleweb-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, args.county_url, args.eagleweb_url)))
+        return
+
+    server = start_server(latency=args.latency)
+    print(f"Stand-in server at {server.county_url} with {args.latency * 1000:.0f}ms latency")
+    print(f"{'mode':<10}{'docs/s':>10}{'pages/s':>10}{'docs':>7}{'pages':>7}{'requests':>10}{'p50':>10}{'p99':>10}{'peak RSS':>11}")
+    for mode in args.modes:
+        result = run_child(mode, server, args.timeout)
+        if "error" in result:
+            print(f"{mode:<10}failed: {result['error']}")
+            continue
+        seconds = result["seconds"]
+        print(f"{mode:<10}{result['documents'] / seconds:>10.1f}{result['pages'] / seconds:>10.1f}"
+              f"{result['documents']:>7}{result['pages']:>7}{result['requests']:>10}"
+              f"{format_value(result['p50'] and result['p50'] * 1000, '{:.1f}ms'):>10}"
+              f"{format_value(result['p99'] and result['p99'] * 1000, '{:.1f}ms'):>10}"
+              f"{format_value(result['peak_rss_mb'], '{:.1f}MB'):>11}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
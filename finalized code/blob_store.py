@@ -0,0 +1,156 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+
+# How the usual <output>/<doc id>/<doc id>_page_N.jpg files point at the stored blobs:
+#   "hardlink" - a second name for the same file (same filesystem only)
+#   "symlink"  - a relative symbolic link into the store
+#   "copy"     - a plain copy (no savings for the view, blobs are still deduplicated)
+# A view that cannot be made falls back to the next kind in this order.
+VIEW_KINDS = ("hardlink", "symlink", "copy")
+
+# Bodies up to this size are hashed in memory before anything is written, so an
+# image that is already stored costs no disk writes at all
+IN_MEMORY_BYTES = 8 * 1024 ** 2
+
+
+# Content-addressed store for downloaded page images. Every distinct body is kept
+# once under objects/<ab>/<cd>/<sha256>; identical pages (blank and cover pages,
+# documents fetched again by overlapping searches) only add a manifest row and a
+# view. manifest.sqlite3 maps (document id, page) to the hash of its image.
+# Safe to share between the scraper's worker threads.
+class BlobStore:
+    def __init__(self, root, view="hardlink"):
+        if view not in VIEW_KINDS:
+            raise ValueError(f"Unknown view kind: {view}")
+        self.root = root
+        self.view = view
+        self.lock = threading.Lock()
+        self.stored = 0
+        self.deduplicated = 0
+        self.stored_bytes = 0
+        self.deduplicated_bytes = 0
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(root, "manifest.sqlite3"), timeout=60, check_same_thread=False)
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    document_id TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (document_id, page)
+                )
+            """)
+            self.connection.execute("CREATE INDEX IF NOT EXISTS pages_sha256 ON pages (sha256)")
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest[2:4], digest)
+
+    # Write chunks into the store (hashing them on the way), record them as the
+    # document's page and make view_path show them. Returns (sha256, size).
+    def put(self, chunks, document_id, page, view_path=None):
+        temp_path = os.path.join(self.root, "tmp", f"{os.getpid()}-{threading.get_ident()}.part")
+        digest = hashlib.sha256()
+        size = 0
+        buffered = []
+        file = None
+        try:
+            for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                if file is not None:
+                    file.write(chunk)
+                    continue
+                buffered.append(chunk)
+                if size > IN_MEMORY_BYTES:
+                    # Too large to hold: spill to a temp file and keep streaming into it
+                    file = open(temp_path, "wb")
+                    file.writelines(buffered)
+                    buffered = None
+        finally:
+            if file is not None:
+                file.close()
+        digest = digest.hexdigest()
+
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            if file is not None:
+                os.remove(temp_path)
+            with self.lock:
+                self.deduplicated += 1
+                self.deduplicated_bytes += size
+        else:
+            if file is None:
+                with open(temp_path, "wb") as file:
+                    file.writelines(buffered)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+            with self.lock:
+                self.stored += 1
+                self.stored_bytes += size
+
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages (document_id, page, sha256, size, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (document_id, int(page), digest, size, datetime.now().isoformat(timespec="seconds")),
+            )
+        if view_path is not None:
+            self.link(digest, view_path)
+        return digest, size
+
+    def lookup(self, document_id, page):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT sha256, size FROM pages WHERE document_id = ? AND page = ?", (document_id, int(page))
+            ).fetchone()
+        return None if row is None else {"sha256": row[0], "size": row[1]}
+
+    # Point view_path at the blob, replacing whatever file was there before
+    def link(self, digest, view_path):
+        path = self.blob_path(digest)
+        if os.path.exists(view_path) and os.path.samefile(path, view_path):
+            return
+        os.makedirs(os.path.dirname(view_path) or ".", exist_ok=True)
+        temp_path = f"{view_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        for kind in VIEW_KINDS[VIEW_KINDS.index(self.view):]:
+            try:
+                if kind == "hardlink":
+                    os.link(path, temp_path)
+                elif kind == "symlink":
+                    os.symlink(os.path.relpath(path, os.path.dirname(os.path.abspath(view_path))), temp_path)
+                else:
+                    shutil.copyfile(path, temp_path)
+                break
+            except OSError:
+                # Cross-device link, no symlink privilege on Windows, ...
+                if kind == VIEW_KINDS[-1]:
+                    raise
+        os.replace(temp_path, view_path)
+
+    # Recreate the <doc id>/<doc id>_page_N.jpg layout under output_folder from the manifest
+    def rebuild_views(self, output_folder):
+        with self.lock:
+            rows = self.connection.execute("SELECT document_id, page, sha256 FROM pages").fetchall()
+        for document_id, page, digest in rows:
+            self.link(digest, os.path.join(output_folder, document_id, f"{document_id}_page_{page}.jpg"))
+        return len(rows)
+
+    def stats(self):
+        with self.lock:
+            return {"stored": self.stored, "deduplicated": self.deduplicated,
+                    "stored_bytes": self.stored_bytes, "deduplicated_bytes": self.deduplicated_bytes}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def format_store_stats(store):
+    stats = store.stats()
+    return (f"{stats['stored']} new images ({stats['stored_bytes'] / 1024 ** 2:.1f} MB), "
+            f"{stats['deduplicated']} already stored ({stats['deduplicated_bytes'] / 1024 ** 2:.1f} MB not written again)")
@@ -0,0 +1,72 @@
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+
+
+# Records which units of a crawl (search windows, documents, image pages) are
+# finished, so that a restarted scrape can skip them. Kept as a SQLite file in the
+# output folder; safe to share between the scraper's worker threads.
+class CheckpointStore:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS units (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    size INTEGER,
+                    sha256 TEXT,
+                    detail TEXT,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (kind, key)
+                )
+            """)
+
+    def get(self, kind, key):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT status, size, sha256, detail FROM units WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "size": row[1], "sha256": row[2], "detail": row[3]}
+
+    def is_done(self, kind, key):
+        unit = self.get(kind, key)
+        return unit is not None and unit["status"] == "done"
+
+    # Keys and details of every finished unit of a kind
+    def done_units(self, kind):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT key, detail FROM units WHERE kind = ? AND status = 'done'", (kind,)
+            ).fetchall()
+
+    def mark_started(self, kind, key):
+        self._save(kind, key, "started", None, None, None)
+
+    def mark_done(self, kind, key, size=None, sha256=None, detail=None):
+        self._save(kind, key, "done", size, sha256, detail)
+
+    def _save(self, kind, key, status, size, sha256, detail):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO units (kind, key, status, size, sha256, detail, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, key, status, size, sha256, detail, datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,163 @@
+import csv
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+import zipfile
+
+INDEX_NAME = "index.json"
+
+# Fixed part of a zip local file header; the name and extra field lengths are its last two fields
+LOCAL_HEADER_SIZE = 30
+
+
+def page_name(page):
+    return f"pages/{int(page):04d}.jpg"
+
+
+def table_name(table_id):
+    return f"tables/{table_id}.csv"
+
+
+# Writes one document as a single uncompressed (ZIP_STORED) zip: the table CSVs, the
+# page images and index.json with the byte offset of every member's data, so a
+# reader can memory-map the file and slice out any page without unpacking it.
+# Written to <path>.part and renamed into place by close(), so a finished archive is
+# never seen half written; discard() drops a document that could not be completed.
+# Accepts document tables like a sink (write_table) and page images like BlobStore
+# (put); both may be called from several threads.
+class DocumentArchiveWriter:
+    def __init__(self, path, document_id):
+        self.path = path
+        self.document_id = document_id
+        self.temp_path = f"{path}.part"
+        self.lock = threading.Lock()
+        self.zip = zipfile.ZipFile(self.temp_path, mode="w", compression=zipfile.ZIP_STORED)
+        self.pages = {}
+        self.tables = {}
+
+    def write_table(self, document_id, table_id, headers, rows, year=None):
+        text = io.StringIO()
+        writer = csv.writer(text)
+        writer.writerow(headers)
+        writer.writerows(rows)
+        with self.lock:
+            self.zip.writestr(table_name(table_id), text.getvalue().encode("utf-8"))
+            self.tables[table_id] = {"name": table_name(table_id)}
+
+    # Same signature as BlobStore.put, so download_images can write pages here.
+    # Pages are fetched in parallel but a zip takes one member at a time, so the
+    # chunks of a page are collected first and written in one go (without joining them)
+    def put(self, chunks, document_id, page, view_path=None):
+        digest = hashlib.sha256()
+        collected = []
+        size = 0
+        for chunk in chunks:
+            digest.update(chunk)
+            collected.append(chunk)
+            size += len(chunk)
+
+        with self.lock:
+            info = zipfile.ZipInfo(page_name(page))
+            info.compress_type = zipfile.ZIP_STORED
+            info.file_size = size
+            with self.zip.open(info, mode="w") as member:
+                for chunk in collected:
+                    member.write(chunk)
+            self.pages[int(page)] = {"name": page_name(page), "size": size, "sha256": digest.hexdigest()}
+        return digest.hexdigest(), size
+
+    def close(self):
+        with self.lock:
+            if self.zip is None:
+                return
+            self.zip.fp.flush()
+            offsets = data_offsets(self.temp_path, self.zip.infolist())
+            for entry in list(self.pages.values()) + list(self.tables.values()):
+                entry["offset"], entry["size"] = offsets[entry["name"]]
+            index = {
+                "document_id": self.document_id,
+                "pages": {str(page): self.pages[page] for page in sorted(self.pages)},
+                "tables": self.tables,
+            }
+            self.zip.writestr(INDEX_NAME, json.dumps(index).encode("utf-8"))
+            self.zip.close()
+            self.zip = None
+            os.replace(self.temp_path, self.path)
+
+    # Remove the .part file without publishing it. An archive an earlier run published
+    # at path stays as it was.
+    def discard(self):
+        with self.lock:
+            if self.zip is None:
+                return
+            try:
+                self.zip.close()
+            finally:
+                self.zip = None
+                os.remove(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+# Where each stored member's bytes start in the file: after its local header, whose
+# name and extra field lengths can differ from the central directory's copy
+def data_offsets(path, infos):
+    offsets = {}
+    with open(path, "rb") as file:
+        for info in infos:
+            file.seek(info.header_offset)
+            header = file.read(LOCAL_HEADER_SIZE)
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            offsets[info.filename] = (info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length, info.file_size)
+    return offsets
+
+
+# Read side: memory-maps an archive and hands out pages as memoryviews of the
+# mapping (no copy) and tables as lists of rows
+class DocumentArchive:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        with zipfile.ZipFile(self.file) as archive:
+            self.index = json.loads(archive.read(INDEX_NAME))
+
+    @property
+    def document_id(self):
+        return self.index["document_id"]
+
+    @property
+    def page_count(self):
+        return len(self.index["pages"])
+
+    def page(self, page):
+        entry = self.index["pages"][str(page)]
+        return memoryview(self.map)[entry["offset"]:entry["offset"] + entry["size"]]
+
+    def table(self, table_id):
+        entry = self.index["tables"].get(table_id)
+        if entry is None:
+            return None
+        text = bytes(self.map[entry["offset"]:entry["offset"] + entry["size"]]).decode("utf-8")
+        return list(csv.reader(io.StringIO(text)))
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
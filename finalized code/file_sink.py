@@ -0,0 +1,89 @@
+import atexit
+import hashlib
+import os
+import threading
+
+# Bytes read from the response and written to disk at a time
+CHUNK_SIZE = 256 * 1024
+
+# Finished files are fsynced in batches of FSYNC_EVERY (with their folders) instead
+# of one by one; 1 syncs every file before it is renamed into place, 0 leaves
+# flushing to the operating system. A file renamed but not yet synced when the
+# machine goes down may come back short; the checkpoint's size (and, with
+# VERIFY_IMAGE_HASH, hash) check catches such pages on the next run.
+FSYNC_EVERY = 64
+
+
+# Streams downloads to disk: chunk_size reads and writes, the body goes to a temp
+# file next to the target that is renamed over it once complete (readers never see a
+# partial file, and a failed download leaves the old file alone), hashing on the way.
+# Safe to share between the scraper's worker threads.
+class FileSink:
+    def __init__(self, chunk_size=CHUNK_SIZE, fsync_every=FSYNC_EVERY):
+        self.chunk_size = chunk_size
+        self.fsync_every = fsync_every
+        self.lock = threading.Lock()
+        self.unsynced = []
+
+    # Write a (stream=True) response body to path. Returns (sha256, size).
+    def write_response(self, response, path):
+        with response:
+            return self.write_chunks(response.iter_content(self.chunk_size), path)
+
+    def write_chunks(self, chunks, path):
+        temp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.part"
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, "wb") as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+                if self.fsync_every == 1:
+                    file.flush()
+                    os.fsync(file.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        if self.fsync_every > 1:
+            with self.lock:
+                self.unsynced.append(path)
+                full = len(self.unsynced) >= self.fsync_every
+            if full:
+                self.flush()
+        return digest.hexdigest(), size
+
+    # fsync every file written since the last batch, then the folders holding them
+    # so the renames are durable too
+    def flush(self):
+        with self.lock:
+            paths, self.unsynced = self.unsynced, []
+        for path in paths:
+            fsync_path(path, os.O_RDWR)
+        for folder in {os.path.dirname(os.path.abspath(path)) for path in paths}:
+            fsync_path(folder, os.O_RDONLY)
+
+
+def fsync_path(path, flags):
+    try:
+        descriptor = os.open(path, flags)
+    except OSError:
+        # Replaced or removed since, or a folder on Windows (which cannot be opened)
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+# Shared by every download of the process so fsync batches span documents
+default_sink = FileSink()
+atexit.register(default_sink.flush)
@@ -0,0 +1,98 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+# Default level for every stage, and per-stage overrides, e.g.
+#   SCRAPER_LOG_LEVEL=WARNING SCRAPER_LOG_STAGES="results=DEBUG,image=INFO"
+# Per-row and per-page messages are DEBUG, so the default INFO keeps a run to a
+# handful of lines plus the progress reports.
+LOG_LEVEL = os.environ.get("SCRAPER_LOG_LEVEL", "INFO").upper()
+STAGE_LEVELS = dict(
+    item.split("=", 1) for item in os.environ.get("SCRAPER_LOG_STAGES", "").split(",") if "=" in item
+)
+
+# Seconds between two progress reports
+PROGRESS_INTERVAL = 10.0
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+listener = None
+setup_lock = threading.Lock()
+
+
+# Scraper loggers hand records to a queue; one background thread formats them and
+# writes to stderr, so worker threads never wait on the terminal
+def setup_logging():
+    global listener
+    with setup_lock:
+        if listener is not None:
+            return
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT, "%H:%M:%S"))
+        records = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(records, handler)
+        listener.start()
+        atexit.register(listener.stop)
+
+        root = logging.getLogger("scraper")
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(logging.handlers.QueueHandler(records))
+        root.propagate = False
+        for stage, level in STAGE_LEVELS.items():
+            logging.getLogger(f"scraper.{stage.strip()}").setLevel(level.strip().upper())
+
+
+# Logger for one stage of a scrape (bootstrap, search, results, document_tables, image, ...)
+def get_logger(stage):
+    setup_logging()
+    return logging.getLogger(f"scraper.{stage}")
+
+
+# Thread-safe counter that logs "done/total label (rate/s, ETA)" at most once per
+# interval instead of a line per item. total may be None (streamed results) or grow
+# with add_total.
+class Progress:
+    def __init__(self, label, total=None, interval=PROGRESS_INTERVAL, logger=None):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.logger = logger or get_logger("progress")
+        self.lock = threading.Lock()
+        self.done = 0
+        self.started = time.monotonic()
+        self.reported = self.started
+
+    def add_total(self, count):
+        with self.lock:
+            self.total = (self.total or 0) + count
+
+    def advance(self, count=1):
+        with self.lock:
+            self.done += count
+            now = time.monotonic()
+            if now - self.reported < self.interval:
+                return
+            self.reported = now
+            message = self._format(now)
+        self.logger.info(message)
+
+    def finish(self):
+        with self.lock:
+            message = self._format(time.monotonic(), final=True)
+        self.logger.info(message)
+
+    def _format(self, now, final=False):
+        elapsed = max(now - self.started, 1e-9)
+        rate = self.done / elapsed
+        if final:
+            return f"{self.done} {self.label} in {elapsed:.1f}s ({rate:.1f}/s)"
+        if self.total is None:
+            return f"{self.done} {self.label} ({rate:.1f}/s)"
+        eta = (self.total - self.done) / rate if rate else float("inf")
+        eta_text = f"{eta:.0f}s" if eta != float("inf") else "unknown"
+        return f"{self.done}/{self.total} {self.label} ({rate:.1f}/s, ETA {eta_text})"
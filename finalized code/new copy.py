@@ -1,87 +1,318 @@
 import os
 import requests
-from bs4 import BeautifulSoup
-import csv
-from datetime import datetime
+from parsers import make_soup, iter_result_rows, ResultRowStream, NEXT_PAGE_LINK_ID
+from checkpoint import CheckpointStore, file_sha256
+from transport import create_session, shared_session, format_connection_stats
+from retry import FailureLedger, default_policy
+from rate_limit import parse_retry_after, default_limiter, AsyncHostSlot
+import transport
+import timing
+from log import get_logger, Progress
+from sinks import CsvSink, create_sink, result_row
+from blob_store import BlobStore, format_store_stats
+from document_archive import DocumentArchiveWriter
+from file_sink import default_sink, CHUNK_SIZE
+from datetime import datetime, timedelta
+import threading
+import queue
+import time
+from contextlib import contextmanager, nullcontext
+import json
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import asyncio
+
+try:
+    import aiohttp
+except ImportError:  # only needed for scrape_async
+    aiohttp = None
 
 BASE_URL = "https://www.thecountyrecorder.com"
 
+# One logger per stage; their levels are set with SCRAPER_LOG_LEVEL/SCRAPER_LOG_STAGES (see log.py)
+bootstrap_log = get_logger("bootstrap")
+search_log = get_logger("search")
+results_log = get_logger("results")
+document_log = get_logger("document_tables")
+image_log = get_logger("image")
+run_log = get_logger("run")
+
+# Number of image pages of one document fetched in parallel (1 = one page at a time)
+IMAGE_WORKERS = 4
+
+# Document pipeline used by get_results_and_download: detail pages (page count and
+# tables) and image downloads run on separate bounded pools
+DETAIL_WORKERS = 4
+IMAGE_DOCUMENT_WORKERS = 2
+MAX_PENDING_DOCUMENTS = 16
+MAX_PENDING_IMAGE_DOCUMENTS = 8
+
+# Read result rows from the search response while it downloads instead of parsing
+# the whole page first (see stream_results_and_download)
+STREAM_RESULTS = True
+
+# SQLite file in the output folder recording finished searches, documents and image pages
+CHECKPOINT_FILE = "checkpoint.sqlite3"
+
+# JSON-lines file in the output folder listing requests and documents that still
+# failed after retrying
+FAILURE_LEDGER_FILE = "failures.jsonl"
+
+# JSON-lines file in the output folder with the timings of every request and parse,
+# summarised by stage at the end of the run (None = off)
+TIMING_FILE = "request_timings.jsonl"
+
+# Where search results and document tables are written: "csv" (one results CSV per
+# search, one CSV per table per document), "parquet" (partitioned datasets under
+# <output>/parquet, needs pyarrow) or "sqlite" (upserted into SQLITE_FILE); see sinks.py
+OUTPUT_FORMAT = "csv"
+# Database of the "sqlite" format, relative to the output folder; an absolute path
+# collects every county and window of scrape_counties/scrape_windows in one file
+SQLITE_FILE = "results.sqlite3"
+
+# SessionPool: sessions are rebuilt after SESSION_MAX_AGE seconds (ASP.NET drops
+# idle session state after 20 minutes by default) and re-checked against the
+# server after sitting idle for SESSION_CHECK_AFTER seconds
+SESSION_MAX_AGE = 15 * 60
+SESSION_CHECK_AFTER = 60
+
+# Cached state/county dropdown values, refreshed from the site after a week
+OPTION_CATALOG_FILE = "county_options.json"
+OPTION_CATALOG_TTL = 7 * 24 * 60 * 60
+
+# How image pages already in the output folder are handled:
+#   "missing"    - only fetch pages that are not on disk (or whose size/hash no longer
+#                  matches the checkpoint)
+#   "revalidate" - conditional GET with the ETag/Last-Modified saved in the checkpoint,
+#                  rewriting only pages the server reports as changed
+#   "always"     - download every page again
+IMAGE_SYNC_MODE = "missing"
+# Also compare the SHA-256 of existing pages with the checkpoint (reads every file)
+VERIFY_IMAGE_HASH = False
+
+# Folder of a content-addressed image store (see blob_store.py), relative to the
+# output folder or absolute to share one store between counties. Each distinct image
+# is kept once and <doc id>/<doc id>_page_N.jpg become IMAGE_STORE_VIEW links to it
+# ("hardlink", "symlink" or "copy"). None writes the pages as plain files.
+IMAGE_STORE = None
+IMAGE_STORE_VIEW = "hardlink"
+
+# Write each document as one <output>/<doc id>.zip (tables, page images and an index
+# of byte offsets; see document_archive.py) instead of a folder of CSVs and JPEGs.
+# Search results still go through OUTPUT_FORMAT.
+PACKED_OUTPUT = False
+
+# ASP.NET pages of one session, kept parsed so their __VIEWSTATE/__EVENTVALIDATION
+# (and dropdowns) can feed the next postback without loading the page again
+class FormStateCache:
+    def __init__(self):
+        self.pages = {}
+        self.lock = threading.Lock()
+
+    def capture(self, url, html):
+        soup = make_soup(html)
+        with self.lock:
+            self.pages[url] = soup
+        return soup
+
+    def get(self, url):
+        with self.lock:
+            return self.pages.get(url)
+
+    def invalidate(self, url):
+        with self.lock:
+            self.pages.pop(url, None)
+
+def get_form_state(session):
+    if getattr(session, "form_state", None) is None:
+        session.form_state = FormStateCache()
+    return session.form_state
+
+# Post back to an ASP.NET page. The form is built from the cached copy of the page
+# when there is one and from a fresh GET otherwise; if the server rejects cached
+# tokens, the page is loaded again and the postback retried once. With capture=True
+# the response becomes the cached state of the page for the next postback.
+def postback(session, url, build_form, capture=True, **kwargs):
+    cache = get_form_state(session)
+    soup = cache.get(url)
+    from_cache = soup is not None
+
+    while True:
+        if soup is None:
+            response = session.get(url)
+            if response.status_code != 200:
+                return None
+            soup = cache.capture(url, response.text)
+
+        form_data = build_form(soup)
+        if form_data is None:
+            return None
+
+        # ASP.NET answers stale __VIEWSTATE/__EVENTVALIDATION with a 500; retrying
+        # that cannot help, so a rejected cached form goes straight to the reload below
+        response = session.post(url, data=form_data, idempotent=True, tentative=from_cache, **kwargs)
+        if response.status_code == 200:
+            if capture:
+                cache.capture(url, response.text)
+            return response
+        if not from_cache:
+            return response
+
+        run_log.info(f"Cached form state for {url} was rejected, reloading the page.")
+        cache.invalidate(url)
+        soup = None
+        from_cache = False
+
+def hidden_form_fields(soup):
+    return {
+        "__VIEWSTATE": soup.find("input", {"name": "__VIEWSTATE"})["value"],
+        "__EVENTVALIDATION": soup.find("input", {"name": "__EVENTVALIDATION"})["value"],
+    }
+
+# Ensure we send the correct option value (confirm the value matches the options)
+def find_option_value(soup, dropdown_id, text):
+    dropdown = soup.find("select", {"id": dropdown_id})
+    if dropdown is None:
+        return None
+    for option in dropdown.find_all("option"):
+        if option.text.strip().upper() == text.upper():
+            return option['value']
+    return None
+
+def dropdown_options(soup, dropdown_id):
+    dropdown = soup.find("select", {"id": dropdown_id})
+    if dropdown is None:
+        return {}
+    return {option.text.strip().upper(): option['value']
+            for option in dropdown.find_all("option") if option.get_text(strip=True) and option.attrs.get('value')}
+
+# Persistent catalog of the cboStates/cboCounties option values:
+# {"fetched_at": <unix time>, "states": {"COLORADO": "..."}, "counties": {"COLORADO": {"TELLER": "..."}}}
+option_catalog = None
+option_catalog_lock = threading.Lock()
+
+def load_option_catalog(path=OPTION_CATALOG_FILE):
+    if not os.path.exists(path):
+        return {"fetched_at": 0, "states": {}, "counties": {}}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+def save_option_catalog(catalog, path=OPTION_CATALOG_FILE):
+    with open(path, mode='w', encoding='utf-8') as file:
+        json.dump(catalog, file, indent=2, sort_keys=True)
+
+# Option value for a state, or for a county of that state, from the catalog on disk
+# (None when it is not listed). No network access.
+def catalog_option_value(state, county=None):
+    global option_catalog
+    with option_catalog_lock:
+        if option_catalog is None:
+            option_catalog = load_option_catalog()
+        catalog = option_catalog
+    if county is None:
+        return catalog["states"].get(state.upper())
+    return catalog["counties"].get(state.upper(), {}).get(county.upper())
+
+# Download the state list and the county list of each state (all states by default)
+def refresh_option_catalog(states=None, path=OPTION_CATALOG_FILE):
+    global option_catalog
+    session = create_session()
+    response = session.get(BASE_URL)
+    if response.status_code != 200:
+        bootstrap_log.error("Failed to load the home page for the option catalog.")
+        return None
+
+    soup = get_form_state(session).capture(BASE_URL, response.text)
+    catalog = load_option_catalog(path)
+    catalog["states"] = dropdown_options(soup, "MainContent_searchMainContent_ctl01_ctl00_cboStates")
+
+    for state in states or catalog["states"]:
+        state_value = catalog["states"].get(state.upper())
+        if not state_value:
+            bootstrap_log.warning(f"State '{state}' not found!")
+            continue
+        post_response = postback(session, BASE_URL, lambda soup: {
+            **hidden_form_fields(soup),
+            "ctl00$ctl00$MainContent$searchMainContent$ctl01$ctl00$cboStates": state_value,
+            "ctl00$ctl00$MainContent$searchMainContent$ctl01$ctl00$btnChangeCounty": "Go"
+        })
+        if post_response is None or post_response.status_code != 200:
+            bootstrap_log.warning(f"Failed to load counties for '{state}'.")
+            continue
+        catalog["counties"][state.upper()] = dropdown_options(get_form_state(session).get(BASE_URL),
+                                                              "MainContent_searchMainContent_ctl01_ctl00_cboCounties")
+        bootstrap_log.info(f"Catalogued {len(catalog['counties'][state.upper()])} counties for {state.upper()}")
+
+    catalog["fetched_at"] = time.time()
+    save_option_catalog(catalog, path)
+    with option_catalog_lock:
+        option_catalog = catalog
+    return catalog
+
+# The catalog from disk, refreshed from the site once it is older than the TTL or
+# is missing one of the requested states. A failed refresh leaves the one on disk.
+def get_option_catalog(states=None, ttl=OPTION_CATALOG_TTL, path=OPTION_CATALOG_FILE):
+    catalog = load_option_catalog(path)
+    stale = time.time() - catalog["fetched_at"] > ttl
+    missing = [state for state in states or [] if state.upper() not in catalog["counties"]]
+    if stale or missing:
+        try:
+            catalog = refresh_option_catalog(states if not stale else None, path) or catalog
+        except requests.RequestException as error:
+            bootstrap_log.warning(f"Failed to refresh the option catalog: {error}")
+    return catalog
+
 # Function to select state
 def select_state(session, state):
-    response = session.get(BASE_URL)
-    
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Extract hidden fields for form submission
-        viewstate = soup.find("input", {"name": "__VIEWSTATE"})["value"]
-        eventvalidation = soup.find("input", {"name": "__EVENTVALIDATION"})["value"]
-
-        # Ensure we send the correct state value (confirm state value matches the options)
-        state_dropdown = soup.find("select", {"id": "MainContent_searchMainContent_ctl01_ctl00_cboStates"})
-        state_value = None
-        for option in state_dropdown.find_all("option"):
-            if option.text.strip().upper() == state.upper():
-                state_value = option['value']
-                break
+    def build_form(soup):
+        # Known option values come from the catalog; otherwise scan the dropdown
+        state_value = catalog_option_value(state)
+        if not state_value:
+            state_value = find_option_value(soup, "MainContent_searchMainContent_ctl01_ctl00_cboStates", state)
 
         if not state_value:
-            print(f"State '{state}' not found!")
-            return False
+            bootstrap_log.warning(f"State '{state}' not found!")
+            return None
 
-        form_data = {
-            "__VIEWSTATE": viewstate,
-            "__EVENTVALIDATION": eventvalidation,
+        return {
+            **hidden_form_fields(soup),
             "ctl00$ctl00$MainContent$searchMainContent$ctl01$ctl00$cboStates": state_value,
             "ctl00$ctl00$MainContent$searchMainContent$ctl01$ctl00$btnChangeCounty": "Go"
         }
 
-        post_response = session.post(BASE_URL, data=form_data)
-        if post_response.status_code == 200:
-            print(f"State '{state}' selected successfully.")
-            return True
-        else:
-            print("Failed to select state.")
-            return False
+    # The response is the home page again, now listing the state's counties, so
+    # select_county can post back from it without another GET
+    post_response = postback(session, BASE_URL, build_form)
+    if post_response is not None and post_response.status_code == 200:
+        bootstrap_log.debug(f"State '{state}' selected successfully.")
+        return True
+    bootstrap_log.error("Failed to select state.")
     return False
 
-# Function to select county
-def select_county(session, county):
-    response = session.get(BASE_URL)
-
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Extract hidden fields for form submission
-        viewstate = soup.find("input", {"name": "__VIEWSTATE"})["value"]
-        eventvalidation = soup.find("input", {"name": "__EVENTVALIDATION"})["value"]
-
-        # Ensure we send the correct county value (confirm county value matches the options)
-        county_dropdown = soup.find("select", {"id": "MainContent_searchMainContent_ctl01_ctl00_cboCounties"})
-        county_value = None
-        for option in county_dropdown.find_all("option"):
-            if option.text.strip().upper() == county.upper():
-                county_value = option['value']
-                break
+# Function to select county (state lets the option catalog resolve the county)
+def select_county(session, county, state=None):
+    def build_form(soup):
+        # Known option values come from the catalog; otherwise scan the dropdown
+        county_value = catalog_option_value(state, county) if state else None
+        if not county_value:
+            county_value = find_option_value(soup, "MainContent_searchMainContent_ctl01_ctl00_cboCounties", county)
 
         if not county_value:
-            print(f"County '{county}' not found!")
-            return False
+            bootstrap_log.warning(f"County '{county}' not found!")
+            return None
 
-        form_data = {
-            "__VIEWSTATE": viewstate,
-            "__EVENTVALIDATION": eventvalidation,
+        return {
+            **hidden_form_fields(soup),
             "ctl00$ctl00$MainContent$searchMainContent$ctl01$ctl00$cboCounties": county_value,
             "ctl00$ctl00$MainContent$searchMainContent$ctl01$ctl00$btnChangeCounty": "Go"
         }
 
-        post_response = session.post(BASE_URL, data=form_data)
-        if post_response.status_code == 200:
-            print(f"County '{county}' selected successfully.")
-            return True
-        else:
-            print("Failed to select county.")
-            return False
+    post_response = postback(session, BASE_URL, build_form)
+    if post_response is not None and post_response.status_code == 200:
+        bootstrap_log.debug(f"County '{county}' selected successfully.")
+        return True
+    bootstrap_log.error("Failed to select county.")
     return False
 
 # Function to accept the disclaimer and navigate to the search page
@@ -90,7 +321,7 @@ def accept_disclaimer(session):
     
     response = session.get(disclaimer_url)
     if response.status_code == 200:
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = make_soup(response.text)
 
         form_action = soup.find("form")["action"]
 
@@ -98,21 +329,23 @@ def accept_disclaimer(session):
             "ctl00$ctl00$MainContent$searchMainContent$ctl01$btnAccept": "Yes, I Accept"
         }
 
-        post_response = session.post(f"{BASE_URL}{form_action}", data=form_data)
+        post_response = session.post(f"{BASE_URL}{form_action}", data=form_data, idempotent=True)
         if post_response.status_code == 200:
-            print("Disclaimer accepted. Redirecting to search page...")
+            bootstrap_log.debug("Disclaimer accepted. Redirecting to search page...")
             
-            # After accepting the disclaimer, we now follow the search link.
+            # After accepting the disclaimer, we now follow the search link. Its form
+            # state is kept for the first setup_search postback.
             search_url = f"{BASE_URL}/Search.aspx"
             response = session.get(search_url)
             if response.status_code == 200:
-                print("Search page loaded successfully.")
+                get_form_state(session).capture(search_url, response.text)
+                bootstrap_log.debug("Search page loaded successfully.")
                 return True
             else:
-                print("Failed to load search page.")
+                bootstrap_log.error("Failed to load search page.")
                 return False
         else:
-            print("Failed to accept disclaimer.")
+            bootstrap_log.error("Failed to accept disclaimer.")
             return False
     return False
 def setup_search_with_pagination(session, state, county, start_date, end_date, output_folder):
@@ -120,10 +353,10 @@ def setup_search_with_pagination(session, state, county, start_date, end_date, o
     
     response = session.get(search_url)
     if response.status_code != 200:
-        print("Failed to load search page.")
+        search_log.error("Failed to load search page.")
         return None
     
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = make_soup(response.text)
     
     # Extract hidden fields for form submission
     viewstate = soup.find("input", {"name": "__VIEWSTATE"})["value"]
@@ -142,88 +375,87 @@ def setup_search_with_pagination(session, state, county, start_date, end_date, o
         "ctl00$ctl00$MainContent$searchMainContent$ctl00$btnSearchDocuments": "Execute Search"
     }
     
-    response = session.post(search_url, data=form_data)
+    response = session.post(search_url, data=form_data, idempotent=True)
     if response.status_code == 200:
-        print("Search executed successfully.")
+        search_log.info("Search executed successfully.")
         return response.text
     else:
-        print("Failed to execute search.")
+        search_log.error("Failed to execute search.")
         return None
     
 
 
 
-def parse_and_handle_pagination(session, soup, output_folder, start_date, end_date):
-    print("Parsing search results with pagination...")
+def parse_and_handle_pagination(session, soup, output_folder, start_date, end_date, state=None, county=None):
+    results_log.info("Parsing search results with pagination...")
     
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
 
+    # One sink for every page, so later pages add to the results instead of replacing them
+    with create_sink(OUTPUT_FORMAT, output_folder, state, county, "search_results.csv", SQLITE_FILE) as sink:
+        handle_pagination(session, soup, output_folder, start_date, end_date, sink)
+
+def handle_pagination(session, soup, output_folder, start_date, end_date, sink):
     # Extract document count and pagination control
     document_count_text = soup.find("li", class_="sce-listitem-inline").text.strip()
     document_count = int(document_count_text.split(":")[1].strip())
 
     # Extract the first batch of results (1000 per page)
-    extract_results_and_download(soup, session, output_folder, start_date, end_date)
+    extract_results_and_download(soup, session, output_folder, start_date, end_date, sink)
 
     # Check if there are more pages (if document count > 1000)
     while document_count > 1000:
-        next_page_link = soup.find("a", id="MainContent_searchMainContent_ctl00_lnkNextPage")
-        if next_page_link and "href" in next_page_link.attrs:
-            next_page_url = f"{BASE_URL}/{next_page_link['href']}"
-            print(f"Moving to next page: {next_page_url}")
-            response = session.get(next_page_url)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                extract_results_and_download(soup, session, output_folder, start_date, end_date)
+        next_page = next_page_href(soup)
+        if next_page:
+            results_log.info(f"Moving to next page: {next_page}")
+            next_page_html = fetch_next_results_page(session, next_page, hidden_input_fields(soup))
+
+            if next_page_html:
+                soup = make_soup(next_page_html)
+                extract_results_and_download(soup, session, output_folder, start_date, end_date, sink)
                 document_count = int(soup.find("li", class_="sce-listitem-inline").text.strip().split(":")[1].strip())
             else:
-                print(f"Failed to load next page {next_page_url}")
+                results_log.error(f"Failed to load next page {next_page}")
                 break
         else:
-            print("No next page link found. Stopping pagination.")
+            results_log.info("No next page link found. Stopping pagination.")
             break
 
 
 
 
 
-def extract_results_and_download(soup, session, output_folder, start_date, end_date):
-    print("Extracting and downloading results...")
+def extract_results_and_download(soup, session, output_folder, start_date, end_date, sink=None):
+    results_log.info("Extracting and downloading results...")
     parent_table = soup.find("table", id="tableMain")
     if parent_table:
-        print("Parent table found")
+        results_log.debug("Parent table found")
         table_content = parent_table.find("td", id="tableMain_Content")
         if table_content:
-            print("Found tableMain_Content td")
+            results_log.debug("Found tableMain_Content td")
             main_div = table_content.find("div", class_="main")
             if main_div:
-                print("Found div.main")
+                results_log.debug("Found div.main")
                 print_results_div = main_div.find("div", id="PrintResults")
                 if print_results_div:
-                    print("Found PrintResults div")
+                    results_log.debug("Found PrintResults div")
                     results_table = print_results_div.find("table", class_="Results")
                     if results_table:
-                        print("Found results table")
+                        results_log.debug("Found results table")
                         rows = results_table.find_all("tr", class_=["results-data-row", "results-data-row listitem-background-color2", "results-data-row listitem-background-color1"])
 
-                        # Convert start_date and end_date to datetime.date objects
-                        try:
-                            start_date_obj = datetime.strptime(start_date, "%m-%d-%Y").date()
-                            end_date_obj = datetime.strptime(end_date, "%m-%d-%Y").date()
-                        except ValueError:
-                            print(f"Invalid date format for start_date or end_date. Please use MM-DD-YYYY.")
+                        dates = parse_search_dates(start_date, end_date)
+                        if dates is None:
                             return
+                        start_date_obj, end_date_obj = dates
 
                         # Prepare to write results and image links
-                        with open(f"{output_folder}/search_results.csv", mode='w', newline='', encoding='utf-8') as file:
-                            writer = csv.writer(file)
-                            writer.writerow(["Item#", "Document ID#", "Recording Date", "Document Type", "Document Name", "Name Type", "Document", "Page Count"])
+                        with nullcontext(sink) if sink is not None else CsvSink(output_folder, "search_results.csv") as sink:
                             for row in rows:
                                 cells = row.find_all("td")
                                 if len(cells) < 6:
-                                    print("Skipping row with insufficient columns")
+                                    results_log.debug("Skipping row with insufficient columns")
                                     continue
 
                                 item_number = cells[0].text.strip()
@@ -248,278 +480,561 @@ def extract_results_and_download(soup, session, output_folder, start_date, end_d
                                         # Try parsing without time
                                         record_date_obj = datetime.strptime(recording_date, "%m-%d-%Y").date()
                                     except ValueError:
-                                        print(f"Skipping invalid date: {recording_date}")
+                                        results_log.warning(f"Skipping invalid date: {recording_date}")
                                         continue  # Skip this row if both fail
 
                                 # Compare the record date with the start and end dates
                                 if start_date_obj <= record_date_obj <= end_date_obj:
-                                    writer.writerow([item_number, document_id, recording_date, document_type, document_name, name_type, document_link, page_count])
-                                    print(f"Extracted: {item_number}, {document_id}, {recording_date}, {document_type}, {document_name}, {name_type}, {document_link}, {page_count}")
+                                    sink.write_result({"item_number": item_number, "document_id": document_id, "recording_date": recording_date,
+                                                       "record_date_obj": record_date_obj, "document_type": document_type, "document_name": document_name,
+                                                       "name_type": name_type, "document_link": document_link}, page_count)
+                                    results_log.debug("Extracted: %s, %s, %s, %s, %s, %s, %s, %s", item_number, document_id, recording_date, document_type, document_name, name_type, document_link, page_count)
                                 
                                 if document_link and page_count.isdigit():
                                     download_images(session, document_id, document_link, int(page_count), output_folder)
                     else:
-                        print("Results table not found inside PrintResults div.")
+                        results_log.warning("Results table not found inside PrintResults div.")
                 else:
-                    print("PrintResults div not found inside div.main.")
+                    results_log.warning("PrintResults div not found inside div.main.")
             else:
-                print("div.main not found inside tableMain_Content.")
+                results_log.warning("div.main not found inside tableMain_Content.")
         else:
-            print("tableMain_Content td not found.")
+            results_log.warning("tableMain_Content td not found.")
 
     
 # Function to set up the search form
-def setup_search(session, state, county, start_date, end_date):
+# With stream=True the search response itself is returned (body not read yet) for
+# stream_results_and_download, otherwise its HTML
+def setup_search(session, state, county, start_date, end_date, stream=False):
     search_url = f"{BASE_URL}/Search.aspx"
-    
-    response = session.get(search_url)
-    if response.status_code != 200:
-        print("Failed to load search page.")
+
+    def build_form(soup):
+        # Correct value for 'Lien' document group
+        lien_value = "365|LIEN"
+
+        return {
+            **hidden_form_fields(soup),
+            "ctl00$ctl00$MainContent$searchMainContent$ctl00$cboDocumentType": lien_value,
+            "ctl00$ctl00$MainContent$searchMainContent$ctl00$tbDateStart": start_date,
+            "ctl00$ctl00$MainContent$searchMainContent$ctl00$tbDateEnd": end_date,
+            "ctl00$ctl00$MainContent$searchMainContent$ctl00$cboResultItemsPerPage": "6|1000",  # Select 1000 results per page
+            "ctl00$ctl00$MainContent$searchMainContent$ctl00$btnSearchDocuments": "Execute Search"
+        }
+
+    # A streamed response is read by the caller, so only a plain one can be cached
+    with timing.stage("search"):
+        response = postback(session, search_url, build_form, capture=not stream, stream=stream)
+    if response is None:
+        search_log.error("Failed to load search page.")
         return None
-    
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # Extract hidden fields for form submission
-    viewstate = soup.find("input", {"name": "__VIEWSTATE"})["value"]
-    eventvalidation = soup.find("input", {"name": "__EVENTVALIDATION"})["value"]
-    
-    # Correct value for 'Lien' document group
-    lien_value = "365|LIEN"
-    
-    form_data = {
-        "__VIEWSTATE": viewstate,
-        "__EVENTVALIDATION": eventvalidation,
-        "ctl00$ctl00$MainContent$searchMainContent$ctl00$cboDocumentType": lien_value,
-        "ctl00$ctl00$MainContent$searchMainContent$ctl00$tbDateStart": start_date,
-        "ctl00$ctl00$MainContent$searchMainContent$ctl00$tbDateEnd": end_date,
-        "ctl00$ctl00$MainContent$searchMainContent$ctl00$btnSearchDocuments": "Execute Search"
-    }
-    
-    response = session.post(search_url, data=form_data)
     if response.status_code == 200:
-        print("Search executed successfully.")
-        return response.text
+        search_log.info("Search executed successfully.")
+        return response if stream else response.text
     else:
-        print("Failed to execute search.")
+        search_log.error("Failed to execute search.")
         return None
 
-def get_document_table_and_save(session, document_id, output_folder):
+# The Next Page link of the results pager is a __doPostBack('<control>', '<argument>')
+POSTBACK_LINK = re.compile(r"__doPostBack\('([^']*)',\s*'([^']*)'\)")
+
+# Every hidden input of a page, all of which go back with a postback from it
+def hidden_input_fields(soup):
+    return {field["name"]: field.attrs.get("value") or ""
+            for field in soup.find_all("input", {"type": "hidden"}) if field.attrs.get("name")}
+
+def next_page_href(soup):
+    link = soup.find("a", id=NEXT_PAGE_LINK_ID)
+    return link.attrs.get("href") if link is not None else None
+
+# Request the results page after the one whose Next Page href and hidden fields are
+# given. Returns the response (stream=True) or its HTML, like setup_search.
+def fetch_next_results_page(session, href, form_fields, stream=False):
+    match = POSTBACK_LINK.search(href)
+    with timing.stage("search"):
+        if match is None:
+            response = session.get(f"{BASE_URL}/{href}", stream=stream)
+        else:
+            form_data = {**form_fields, "__EVENTTARGET": match.group(1), "__EVENTARGUMENT": match.group(2)}
+            response = session.post(f"{BASE_URL}/Search.aspx", data=form_data, idempotent=True, stream=stream)
+    if response.status_code != 200:
+        search_log.error(f"Failed to load the next results page ({response.status_code}).")
+        response.close()
+        return None
+    return response if stream else response.text
+
+def get_document_table_and_save(session, document_id, output_folder, soup=None, sink=None, year=None):
     """
-    This function will visit the document page, extract content from multiple tables and save them into CSV files.
+    This function will visit the document page, extract content from multiple tables and save them through the sink
+    (per-document CSV files by default). A document page already fetched with fetch_document_page can be passed in as
+    soup to skip the request; year (of the recording date) selects the partition of columnar sinks.
     """
-    base_url = "https://www.thecountyrecorder.com"
-    document_url = f"{base_url}/Document.aspx?DK={document_id}"
-    
-    response = session.get(document_url)
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Prepare CSV output folder for this document
-        doc_folder = os.path.join(output_folder, document_id)
-        os.makedirs(doc_folder, exist_ok=True)
-        
-        # Find the tables and process each one
-        tables = [
-            ("Table7", ["Document Identifier", "Book-Page", "Recording Date-Time", "Document Type", "Page Count", "View Image"]),
-            ("Table98", ["Document Names"]),
-            ("Table101", ["Related Documents - Affected By"]),
-            ("Table41", ["Legal"]),
-            ("Table42", ["Parcel ID"]),
-            ("Table39", ["Street", "City"]),
-            ("DescriptionTable", ["Description"]),
-            ("Table102", ["Recording Fees"]),
-            ("TablePerfectedDate", ["Perfected Date"])
-        ]
-        
-        for table_id, headers in tables:
-            table = soup.find("table", id=table_id)
-            if table:
-                print(f"Found table with id '{table_id}' for Document ID: {document_id}")
-                
-                # Find all rows within the table
-                rows = table.find_all("tr")
-                
-                # Prepare a CSV file for this table
-                csv_file_path = os.path.join(doc_folder, f"{document_id}_{table_id}.csv")
-                
-                with open(csv_file_path, mode='w', newline='', encoding='utf-8') as file:
-                    writer = csv.writer(file)
-                    
-                    # Write header row based on provided headers
-                    writer.writerow(headers)
-                    
-                    # Loop through each row to capture table and form data
-                    for row in rows:
-                        cells = row.find_all("td")
-                        row_data = []
-
-                        # Extract text content from each cell
-                        for cell in cells:
-                            cell_text = cell.get_text(strip=True)
-                            
-                            # If cell is empty, check for inner HTML or other nested tags
-                            if not cell_text:
-                                inner_html = ''.join([str(tag) for tag in cell.find_all(True)])
-                                cell_text = inner_html.strip()
-                            
-                            row_data.append(cell_text if cell_text else "")  # Keep empty if no content
-
-                        # Write row data to CSV
-                        if row_data:  # Avoid empty rows
-                            writer.writerow(row_data)
-                            print(f"Extracted data from row: {row_data}")
-            else:
-                print(f"Could not find table with id '{table_id}' for Document ID: {document_id}")
-    else:
-        print(f"Failed to access the document page for Document ID: {document_id}")
+    if soup is None:
+        soup = fetch_document_page(session, f"Document.aspx?DK={document_id}")
+        if soup is None:
+            document_log.warning(f"Failed to access the document page for Document ID: {document_id}")
+            return
+
+    if sink is None:
+        sink = CsvSink(output_folder)
+
+    # Find the tables and process each one
+    tables = [
+        ("Table7", ["Document Identifier", "Book-Page", "Recording Date-Time", "Document Type", "Page Count", "View Image"]),
+        ("Table98", ["Document Names"]),
+        ("Table101", ["Related Documents - Affected By"]),
+        ("Table41", ["Legal"]),
+        ("Table42", ["Parcel ID"]),
+        ("Table39", ["Street", "City"]),
+        ("DescriptionTable", ["Description"]),
+        ("Table102", ["Recording Fees"]),
+        ("TablePerfectedDate", ["Perfected Date"])
+    ]
+
+    for table_id, headers in tables:
+        table = soup.find("table", id=table_id)
+        if table:
+            document_log.debug("Found table with id '%s' for Document ID: %s", table_id, document_id)
+            sink.write_table(document_id, table_id, headers, extract_table_rows(table), year)
+        else:
+            document_log.debug("Could not find table with id '%s' for Document ID: %s", table_id, document_id)
 
+def extract_table_rows(table):
+    table_rows = []
+    # Loop through each row to capture table and form data
+    for row in table.find_all("tr"):
+        cells = row.find_all("td")
+        row_data = []
 
-        
-def get_results_and_download(soup, session, output_folder, start_date, end_date):
-    print("Parsing search results...")
+        # Extract text content from each cell
+        for cell in cells:
+            cell_text = cell.get_text(strip=True)
 
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
+            # If cell is empty, check for inner HTML or other nested tags
+            if not cell_text:
+                inner_html = ''.join([str(tag) for tag in cell.find_all(True)])
+                cell_text = inner_html.strip()
+
+            row_data.append(cell_text if cell_text else "")  # Keep empty if no content
+
+        if row_data:  # Avoid empty rows
+            table_rows.append(row_data)
+            document_log.debug("Extracted data from row: %s", row_data)
+    return table_rows
 
+
+        
+def find_result_rows(soup):
     parent_table = soup.find("table", id="tableMain")
     if parent_table:
-        print("Parent table found")
+        results_log.debug("Parent table found")
 
         table_content = parent_table.find("td", id="tableMain_Content")
         if table_content:
-            print("Found tableMain_Content td")
+            results_log.debug("Found tableMain_Content td")
 
             main_div = table_content.find("div", class_="main")
             if main_div:
-                print("Found div.main")
+                results_log.debug("Found div.main")
                 print_results_div = main_div.find("div", id="PrintResults")
                 if print_results_div:
-                    print("Found PrintResults div")
+                    results_log.debug("Found PrintResults div")
 
                     results_table = print_results_div.find("table", class_="Results")
                     if results_table:
-                        print("Found results table")
-                        rows = results_table.find_all("tr", class_=["results-data-row", "results-data-row listitem-background-color2", "results-data-row listitem-background-color1"])
-
-                        # Convert start_date and end_date to datetime.date objects
-                        try:
-                            start_date_obj = datetime.strptime(start_date, "%m-%d-%Y").date()
-                            end_date_obj = datetime.strptime(end_date, "%m-%d-%Y").date()
-                        except ValueError:
-                            print(f"Invalid date format for start_date or end_date. Please use MM-DD-YYYY.")
-                            return
-
-                        # Prepare to write results and image links
-                        with open(f"{output_folder}/search_results.csv", mode='w', newline='', encoding='utf-8') as file:
-                            writer = csv.writer(file)
-                            writer.writerow(["Item#", "Document ID#", "Recording Date", "Document Type", "Document Name", "Name Type", "Document", "Page Count"])
-                            for row in rows:
-                                cells = row.find_all("td")
-                                if len(cells) < 6:
-                                    print("Skipping row with insufficient columns")
-                                    continue
+                        results_log.debug("Found results table")
+                        return results_table.find_all("tr", class_=["results-data-row", "results-data-row listitem-background-color2", "results-data-row listitem-background-color1"])
+                    else:
+                        results_log.warning("Results table not found inside PrintResults div.")
+                else:
+                    results_log.warning("PrintResults div not found inside div.main.")
+            else:
+                results_log.warning("div.main not found inside tableMain_Content.")
+        else:
+            results_log.warning("tableMain_Content td not found.")
+    return None
+
+def parse_result_row(row):
+    cells = []
+    for cell in row.find_all("td"):
+        link = cell.find("a")
+        cells.append((cell.text, link["href"] if link else None))
+    return build_result_record(cells)
+
+# Turn one results row, given as (cell text, link href) pairs, into a record
+def build_result_record(cells):
+    if len(cells) < 6:
+        results_log.debug("Skipping row with insufficient columns")
+        return None
 
-                                item_number = cells[0].text.strip()
-                                document_id = cells[1].text.strip()
-                                recording_date = cells[2].text.strip()
-                                document_type = cells[3].text.strip()
-                                document_name = cells[4].text.strip()
-                                name_type = cells[5].text.strip()
+    recording_date = cells[2][0].strip()
+    try:
+        # Try parsing with time
+        record_date_obj = datetime.strptime(recording_date, "%m-%d-%Y %I:%M:%S %p").date()
+    except ValueError:
+        try:
+            # Try parsing without time
+            record_date_obj = datetime.strptime(recording_date, "%m-%d-%Y").date()
+        except ValueError:
+            results_log.warning(f"Skipping invalid date: {recording_date}")
+            return None  # Skip this row if both fail
+
+    return {
+        "item_number": cells[0][0].strip(),
+        "document_id": cells[1][0].strip(),
+        "recording_date": recording_date,
+        "record_date_obj": record_date_obj,
+        "document_type": cells[3][0].strip(),
+        "document_name": cells[4][0].strip(),
+        "name_type": cells[5][0].strip(),
+        # Hyperlink for document ID
+        "document_link": cells[1][1] or "",
+    }
 
-                                # Extract hyperlink for document ID
-                                document_link = ""
-                                if cells[1].find("a"):
-                                    document_link = cells[1].find("a")["href"]
+# Detail-page stage of the pipeline: runs on the detail pool and hands the
+# document's images to the image pool, so the CSV writer only waits on this part
+def process_document(session, record, output_folder, image_executor, image_slots, checkpoint=None, sink=None):
+    document_id = record["document_id"]
+    document_link = record["document_link"]
+    if not document_link:
+        return "N/A"
+
+    # Finished in an earlier run and its pages are still on disk. The other sync modes
+    # look at every page again, so they never skip documents
+    if checkpoint and IMAGE_SYNC_MODE == "missing":
+        unit = checkpoint.get("document", document_id)
+        if unit and unit["status"] == "done" and document_is_current(checkpoint, output_folder, document_id, unit["detail"]):
+            document_log.debug("Skipping finished document %s", document_id)
+            return unit["detail"]
+
+    # A request that still fails after retrying costs this document, not the search;
+    # it stays unfinished in the checkpoint and is fetched again by the next run
+    archive = None
+    try:
+        # One detail-page request feeds both the page count and the table extraction
+        with timing.stage("page_count"):
+            soup = fetch_document_page(session, document_link)
+            if soup is None:
+                return "N/A"
+            page_count = get_page_count(session, document_link, soup=soup)
+
+        # The archive takes the tables and, once the image pool is done with them, the pages
+        archive = DocumentArchiveWriter(os.path.join(output_folder, f"{document_id}.zip"), document_id) if PACKED_OUTPUT else None
+        with timing.stage("document_tables"):
+            get_document_table_and_save(session, document_id, output_folder, soup=soup, sink=archive or sink, year=record["record_date_obj"].year)
+    except requests.RequestException as error:
+        if archive is not None:
+            archive.discard()
+        document_log.warning(f"Failed to fetch document {document_id}: {error}")
+        record_failure(session, "document", document_id, error)
+        return "N/A"
+    except BaseException:
+        if archive is not None:
+            archive.discard()
+        raise
+
+    if page_count.isdigit():
+        def images_done(future):
+            image_slots.release()
+            # Only a document whose every page arrived counts as finished, and only
+            # then is its archive published; the next run writes it again otherwise
+            finished = future.exception() is None and all(future.result())
+            if archive is not None:
+                if finished:
+                    archive.close()
+                else:
+                    archive.discard()
+            if future.exception() is not None:
+                image_log.error(f"Image download failed for document {document_id}: {future.exception()!r}")
+                record_failure(session, "document", document_id, future.exception())
+            elif checkpoint and finished:
+                checkpoint.mark_done("document", document_id, detail=page_count)
+
+        # Blocks this detail worker (not the writer) while the image pool is full
+        image_slots.acquire()
+        try:
+            future = image_executor.submit(download_images, session, document_id, document_link, int(page_count), output_folder,
+                                           checkpoint=checkpoint, store=archive)
+        except BaseException:
+            image_slots.release()
+            if archive is not None:
+                archive.discard()
+            raise
+        future.add_done_callback(images_done)
+        return page_count
+
+    if archive is not None:
+        archive.close()
+    if checkpoint:
+        checkpoint.mark_done("document", document_id, detail=page_count)
+    return page_count
+
+def record_failure(session, kind, target, error):
+    if session is not None:
+        record_to_ledger(session.failure_ledger, kind, target, error)
+
+def record_to_ledger(ledger, kind, target, error):
+    if ledger is not None:
+        ledger.record(kind, target, error=repr(error))
+
+# The search's MM-DD-YYYY start and end dates as dates, or None (logged) when they do not parse
+def parse_search_dates(start_date, end_date):
+    try:
+        return datetime.strptime(start_date, "%m-%d-%Y").date(), datetime.strptime(end_date, "%m-%d-%Y").date()
+    except ValueError:
+        results_log.error("Invalid date format for start_date or end_date. Please use MM-DD-YYYY.")
+        return None
 
-                                page_count = get_page_count(session, document_link) if document_link else "N/A"
+def get_results_and_download(soup, session, output_folder, start_date, end_date, checkpoint=None, sink=None):
+    results_log.info("Parsing search results...")
 
-                                try:
-                                    # Try parsing with time
-                                    record_date_obj = datetime.strptime(recording_date, "%m-%d-%Y %I:%M:%S %p").date()
-                                except ValueError:
-                                    try:
-                                        # Try parsing without time
-                                        record_date_obj = datetime.strptime(recording_date, "%m-%d-%Y").date()
-                                    except ValueError:
-                                        print(f"Skipping invalid date: {recording_date}")
-                                        continue  # Skip this row if both fail
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
 
-                                # Compare the record date with the start and end dates
-                                if start_date_obj <= record_date_obj <= end_date_obj:
-                                    writer.writerow([item_number, document_id, recording_date, document_type, document_name, name_type, document_link, page_count])
-                                    print(f"Extracted: {item_number}, {document_id}, {recording_date}, {document_type}, {document_name}, {name_type}, {document_link}, {page_count}")
-                                
-                                # Now extract data from the document's hyperlink
-                                if document_link:
-                                    get_document_table_and_save(session, document_id, output_folder)
+    rows = find_result_rows(soup)
+    if rows is None:
+        return
 
-                                if document_link and page_count.isdigit():
-                                    download_images(session, document_id, document_link, int(page_count), output_folder)
-                    else:
-                        print("Results table not found inside PrintResults div.")
-                else:
-                    print("PrintResults div not found inside div.main.")
-            else:
-                print("div.main not found inside tableMain_Content.")
-        else:
-            print("tableMain_Content td not found.")
+    dates = parse_search_dates(start_date, end_date)
+    if dates is None:
+        return
+    start_date_obj, end_date_obj = dates
 
+    records = [record for record in (parse_result_row(row) for row in rows) if record]
+    return run_document_pipeline(session, records, output_folder, start_date_obj, end_date_obj, checkpoint, sink)
 
+# Same as get_results_and_download, but rows are read from the streamed search
+# response as they arrive, so documents start before the page finishes downloading
+def stream_results_and_download(session, response, output_folder, start_date, end_date, checkpoint=None, sink=None, parser=None):
+    results_log.info("Streaming search results...")
+    os.makedirs(output_folder, exist_ok=True)
 
-def get_page_count(session, document_link):
-    base_url = "https://www.thecountyrecorder.com/"
-    full_url = base_url + document_link
+    dates = parse_search_dates(start_date, end_date)
+    if dates is None:
+        return
+    start_date_obj, end_date_obj = dates
+
+    records = (record for record in (build_result_record(cells) for cells in iter_result_rows(response, parser=parser)) if record)
+    return run_document_pipeline(session, records, output_folder, start_date_obj, end_date_obj, checkpoint, sink)
+
+# Returns the IDs of documents that did not finish (always empty without a checkpoint).
+# Without a sink, results go to search_results.csv and tables to per-document CSVs.
+def run_document_pipeline(session, records, output_folder, start_date_obj, end_date_obj, checkpoint=None, sink=None):
+    document_ids = []
+    # Streamed records arrive as a generator, so their total is not known up front.
+    # Image pools are bounded, so documents written here are at most a few behind
+    # finished ones
+    progress = Progress("documents", total=len(records) if isinstance(records, list) else None)
+    # Prepare to write results and image links
+    with nullcontext(sink) if sink is not None else CsvSink(output_folder, "search_results.csv") as sink:
+        image_slots = threading.BoundedSemaphore(MAX_PENDING_IMAGE_DOCUMENTS)
+        with ThreadPoolExecutor(max_workers=IMAGE_DOCUMENT_WORKERS) as image_executor, \
+                ThreadPoolExecutor(max_workers=DETAIL_WORKERS) as detail_executor:
+            pending = deque()
+            for record in records:
+                if record["document_link"]:
+                    document_ids.append(record["document_id"])
+                pending.append((record, detail_executor.submit(process_document, session, record, output_folder, image_executor, image_slots, checkpoint, sink)))
+                # Backpressure: never keep more than MAX_PENDING_DOCUMENTS detail fetches queued
+                if len(pending) >= MAX_PENDING_DOCUMENTS:
+                    write_result_row(sink, *pending.popleft(), start_date_obj, end_date_obj)
+                    progress.advance()
+            while pending:
+                write_result_row(sink, *pending.popleft(), start_date_obj, end_date_obj)
+                progress.advance()
+    progress.finish()
+
+    if checkpoint is None:
+        return []
+    return [document_id for document_id in document_ids if not checkpoint.is_done("document", document_id)]
+
+def write_result_row(sink, record, future, start_date_obj, end_date_obj):
+    page_count = future.result()
+
+    # Compare the record date with the start and end dates
+    if start_date_obj <= record["record_date_obj"] <= end_date_obj:
+        sink.write_result(record, page_count)
+        results_log.debug("Extracted: %s", result_row(record, page_count))
+
+
+
+# Fetch and parse a document detail page once, so that the page count and the
+# document tables can both be read from the same response
+def fetch_document_page(session, document_link):
+    full_url = f"{BASE_URL}/{document_link}"
     response = session.get(full_url)
-    
+
     if response.status_code == 200:
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Check for "View Image" button presence
-        view_image_button = soup.find("input", id="MainContent_searchMainContent_ctl00_btnViewImage")
-        if not view_image_button:
-            print("No 'View Image' button found. Skipping image extraction for this document.")
+        return make_soup(response.text)
+    document_log.warning(f"Failed to load document page {full_url}")
+    return None
+
+def get_page_count(session, document_link, soup=None):
+    if soup is None:
+        soup = fetch_document_page(session, document_link)
+        if soup is None:
             return "N/A"
 
-        # Extract page count
-        page_count_input = soup.find("input", id="MainContent_searchMainContent_ctl00_tbPageCount")
-        if page_count_input and "value" in page_count_input.attrs:
-            print(f"Found page count input: {page_count_input['value']}")
-            return page_count_input["value"].strip()
-        
+    # Check for "View Image" button presence
+    view_image_button = soup.find("input", id="MainContent_searchMainContent_ctl00_btnViewImage")
+    if not view_image_button:
+        document_log.debug("No 'View Image' button found. Skipping image extraction for this document.")
+        return "N/A"
+
+    # Extract page count
+    page_count_input = soup.find("input", id="MainContent_searchMainContent_ctl00_tbPageCount")
+    if page_count_input and "value" in page_count_input.attrs:
+        document_log.debug("Found page count input: %s", page_count_input['value'])
+        return page_count_input["value"].strip()
+
     return "N/A"
 
-def download_images(session, document_id, link, page_count, output_folder):
-    x_value = link.split("?")[-1]
-    base_url = "https://www.thecountyrecorder.com"
-    
-    # Create output directory if it doesn't exist
+# Whether an image page already on disk can be kept without asking the server
+def image_is_current(file_name, unit):
+    if not os.path.exists(file_name) or os.path.getsize(file_name) == 0:
+        return False
+    if unit is None:
+        # Left by a run without a checkpoint: trust any non-empty file
+        return True
+    if unit["status"] != "done" or os.path.getsize(file_name) != unit["size"]:
+        return False
+    if VERIFY_IMAGE_HASH and unit["sha256"]:
+        return file_sha256(file_name) == unit["sha256"]
+    return True
+
+# Whether a document finished in an earlier run is still complete on disk: its
+# archive in PACKED_OUTPUT mode, otherwise every image page (see image_is_current)
+def document_is_current(checkpoint, output_folder, document_id, page_count):
+    if PACKED_OUTPUT:
+        return os.path.exists(os.path.join(output_folder, f"{document_id}.zip"))
+    if not page_count or not page_count.isdigit():
+        return True
     doc_folder = os.path.join(output_folder, document_id)
-    os.makedirs(doc_folder, exist_ok=True)
-    
-    for page_num in range(1, page_count + 1):
-        image_page_url = f"{base_url}/Image.aspx?{x_value}&PN={page_num}"
-        response = session.get(image_page_url)
-        
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            image_tag = soup.find("img", {"id": "MainContent_searchMainContent_ctl00_Image2"})
-            
-            if image_tag and "src" in image_tag.attrs:
-                image_url = f"{base_url}/{image_tag['src']}"
-                image_response = session.get(image_url, stream=True)
-                
-                if image_response.status_code == 200 and 'image' in image_response.headers.get('Content-Type', ''):
-                    file_name = os.path.join(doc_folder, f"{document_id}_page_{page_num}.jpg")
-                    with open(file_name, 'wb') as file:
-                        for chunk in image_response.iter_content(1024):
-                            file.write(chunk)
-                    print(f"Downloaded {file_name}")
+    return all(image_is_current(os.path.join(doc_folder, f"{document_id}_page_{page_num}.jpg"),
+                                checkpoint.get("image", f"{document_id}|{page_num}"))
+               for page_num in range(1, int(page_count) + 1))
+
+def save_image_response(image_response, file_name, image_url, checkpoint, checkpoint_key, store=None):
+    if store is not None:
+        document_id, page_num = checkpoint_key.rsplit("|", 1)
+        with image_response:
+            sha256, size = store.put(image_response.iter_content(CHUNK_SIZE), document_id, page_num, file_name)
+    else:
+        sha256, size = default_sink.write_response(image_response, file_name)
+    if checkpoint:
+        # Validators let IMAGE_SYNC_MODE = "revalidate" ask the server whether the page changed
+        validators = {
+            "url": image_url,
+            "etag": image_response.headers.get("ETag"),
+            "last_modified": image_response.headers.get("Last-Modified"),
+        }
+        checkpoint.mark_done("image", checkpoint_key, size=size, sha256=sha256, detail=json.dumps(validators))
+    image_log.debug("Downloaded %s", file_name)
+    return file_name
+
+# Conditional GET for a page downloaded before. Returns the file name when the copy on
+# disk is still current or has been refreshed, None when the normal flow is needed
+def revalidate_image(session, file_name, unit, checkpoint, checkpoint_key, store=None):
+    validators = json.loads(unit["detail"]) if unit and unit["detail"] else {}
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    if not headers or not os.path.exists(file_name):
+        return None
+
+    image_response = session.get(validators["url"], headers=headers, stream=True)
+    if image_response.status_code == 304:
+        image_response.close()
+        image_log.debug("Unchanged %s", file_name)
+        return file_name
+    if image_response.status_code == 200 and 'image' in image_response.headers.get('Content-Type', ''):
+        return save_image_response(image_response, file_name, validators["url"], checkpoint, checkpoint_key, store)
+    image_response.close()
+    return None
+
+def download_image_page(session, document_id, x_value, page_num, doc_folder, checkpoint=None, store=None):
+    with timing.stage("image"):
+        file_name = os.path.join(doc_folder, f"{document_id}_page_{page_num}.jpg")
+        checkpoint_key = f"{document_id}|{page_num}"
+        unit = checkpoint.get("image", checkpoint_key) if checkpoint else None
+        # Pages on disk only count for the loose layout; an archive is always written whole
+        packed = isinstance(store, DocumentArchiveWriter)
+
+        if IMAGE_SYNC_MODE == "missing" and not packed and image_is_current(file_name, unit):
+            image_log.debug("Skipping existing page %s", file_name)
+            return file_name
+        if IMAGE_SYNC_MODE == "revalidate" and not packed:
+            try:
+                revalidated = revalidate_image(session, file_name, unit, checkpoint, checkpoint_key, store)
+            except requests.RequestException as error:
+                # Fall back to fetching the page the normal way
+                image_log.debug("Revalidating %s failed: %s", file_name, error)
+                revalidated = None
+            if revalidated:
+                return revalidated
+
+        # A page that still fails after retrying is logged and left for the next run
+        try:
+            image_page_url = f"{BASE_URL}/Image.aspx?{x_value}&PN={page_num}"
+            response = session.get(image_page_url)
+
+            if response.status_code == 200:
+                soup = make_soup(response.text)
+                image_tag = soup.find("img", {"id": "MainContent_searchMainContent_ctl00_Image2"})
+
+                if image_tag and "src" in image_tag.attrs:
+                    image_url = f"{BASE_URL}/{image_tag['src']}"
+                    image_response = session.get(image_url, stream=True)
+
+                    if image_response.status_code == 200 and 'image' in image_response.headers.get('Content-Type', ''):
+                        return save_image_response(image_response, file_name, image_url, checkpoint, checkpoint_key, store)
+                    else:
+                        image_log.warning(f"Failed to download image from {image_url} or received non-image content.")
                 else:
-                    print(f"Failed to download image from {image_url} or received non-image content.")
+                    image_log.warning(f"No image found on page {page_num}")
             else:
-                print(f"No image found on page {page_num}")
-        else:
-            print(f"Failed to load image page {image_page_url}")
+                image_log.warning(f"Failed to load image page {image_page_url}")
+        except requests.RequestException as error:
+            image_log.warning(f"Failed to download page {page_num} of document {document_id}: {error}")
+            record_failure(session, "image", checkpoint_key, error)
+        return None
+
+# store receives the page bodies instead of plain files: the IMAGE_STORE by default,
+# or the document's archive in PACKED_OUTPUT mode
+def download_images(session, document_id, link, page_count, output_folder, max_workers=IMAGE_WORKERS, checkpoint=None, store=None):
+    x_value = link.split("?")[-1]
+
+    doc_folder = os.path.join(output_folder, document_id)
+    if store is None:
+        # Create output directory if it doesn't exist
+        os.makedirs(doc_folder, exist_ok=True)
+        store = image_store(output_folder)
+
+    if max_workers <= 1 or page_count <= 1:
+        return [download_image_page(session, document_id, x_value, page_num, doc_folder, checkpoint, store)
+                for page_num in range(1, page_count + 1)]
+
+    # Fetch all pages of the document at once; the pool bounds how many are in flight
+    # and every worker shares the logged-in session (and its ASP.NET cookies)
+    with ThreadPoolExecutor(max_workers=min(max_workers, page_count)) as executor:
+        futures = [executor.submit(download_image_page, session, document_id, x_value, page_num, doc_folder, checkpoint, store)
+                   for page_num in range(1, page_count + 1)]
+        return [future.result() for future in futures]
+
+image_stores = {}
+image_stores_lock = threading.Lock()
+
+# The IMAGE_STORE of an output folder, opened once per process and shared by every
+# search writing there (None when the store is off)
+def image_store(output_folder):
+    if not IMAGE_STORE:
+        return None
+    root = os.path.abspath(os.path.join(output_folder, IMAGE_STORE))
+    with image_stores_lock:
+        if root not in image_stores:
+            image_stores[root] = BlobStore(root, view=IMAGE_STORE_VIEW)
+        return image_stores[root]
 
 # Function to download files
 def download_files(document_id, output_folder):
@@ -528,31 +1043,652 @@ def download_files(document_id, output_folder):
     
     file_url = f"{BASE_URL}/Document.aspx?DK={document_id}"
 
-    response = requests.get(file_url)
+    # Reuses pooled keep-alive connections instead of a new one per file
+    response = shared_session().get(file_url, stream=True)
     if response.status_code == 200:
         file_name = os.path.join(output_folder, f"{document_id}.pdf")
-        with open(file_name, 'wb') as file:
-            file.write(response.content)
-        print(f"Downloaded {file_name}")
+        default_sink.write_response(response, file_name)
+        image_log.debug("Downloaded %s", file_name)
     else:
-        print(f"Failed to download {file_url}")
+        response.close()
+        image_log.warning(f"Failed to download {file_url}")
+
+# Create a session bound to one state/county with the disclaimer accepted
+def bootstrap_session(state, county):
+    with timing.stage("bootstrap"):
+        # Enough pooled connections for every detail and image worker to keep its own
+        pool_size = DETAIL_WORKERS + IMAGE_DOCUMENT_WORKERS * IMAGE_WORKERS
+        session = create_session(pool_maxsize=max(pool_size, 1))
+        # Search results and documents depend on the county the session selected
+        session.cache_scope = f"{state.upper()}|{county.upper()}"
+
+        if not select_state(session, state):
+            return None
+        if not select_county(session, county, state):
+            return None
+        if not accept_disclaimer(session):
+            return None
+        return session
+
+# Keeps warm sessions already bound to one state/county with the disclaimer accepted,
+# so bulk jobs do not pay the bootstrap round trips for every task
+class SessionPool:
+    def __init__(self, state, county, size=4, max_age=SESSION_MAX_AGE, check_after=SESSION_CHECK_AFTER):
+        self.state = state
+        self.county = county
+        self.size = size
+        self.max_age = max_age
+        self.check_after = check_after
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.created = {}
+        self.last_used = {}
+
+    # Bootstrap sessions up front (in parallel) until the pool is full
+    def warm(self):
+        with self.lock:
+            missing = self.size - len(self.created)
+        with ThreadPoolExecutor(max_workers=max(missing, 1)) as executor:
+            for session in executor.map(lambda _: self._create(), range(missing)):
+                if session is not None:
+                    self.idle.put(session)
+
+    def _create(self):
+        session = bootstrap_session(self.state, self.county)
+        if session is None:
+            return None
+        with self.lock:
+            self.created[id(session)] = time.monotonic()
+            self.last_used[id(session)] = time.monotonic()
+        return session
+
+    def _evict(self, session):
+        with self.lock:
+            self.created.pop(id(session), None)
+            self.last_used.pop(id(session), None)
+        session.close()
+
+    # A session is healthy while it is younger than max_age and, after sitting idle
+    # for check_after seconds, the search page still loads instead of redirecting
+    # back to the disclaimer or home page (the server dropped its state)
+    def is_healthy(self, session):
+        with self.lock:
+            created = self.created.get(id(session))
+            last_used = self.last_used.get(id(session))
+        now = time.monotonic()
+        if created is None or now - created > self.max_age:
+            return False
+        if now - last_used < self.check_after:
+            return True
 
-# Main scraping function
-def scrape(state, county, start_date, end_date, output_folder):
-    session = requests.Session()
+        search_url = f"{BASE_URL}/Search.aspx"
+        with timing.stage("bootstrap"):
+            response = session.get(search_url)
+        if response.status_code != 200 or "Search.aspx" not in response.url:
+            return False
+        get_form_state(session).capture(search_url, response.text)
+        return True
+
+    def acquire(self):
+        while True:
+            try:
+                session = self.idle.get_nowait()
+            except queue.Empty:
+                with self.lock:
+                    can_grow = len(self.created) < self.size
+                if can_grow:
+                    session = self._create()
+                    if session is None:
+                        raise RuntimeError(f"Could not bootstrap a session for {self.county}, {self.state}")
+                    return session
+                session = self.idle.get()
+
+            if self.is_healthy(session):
+                return session
+            bootstrap_log.info("Evicting expired session from the pool.")
+            self._evict(session)
+
+    def release(self, session, healthy=True):
+        if not healthy:
+            self._evict(session)
+            return
+        with self.lock:
+            self.last_used[id(session)] = time.monotonic()
+        self.idle.put(session)
+
+    @contextmanager
+    def session(self):
+        session = self.acquire()
+        try:
+            yield session
+        except Exception:
+            self.release(session, healthy=False)
+            raise
+        self.release(session)
+
+    def close(self):
+        while True:
+            try:
+                self._evict(self.idle.get_nowait())
+            except queue.Empty:
+                return
 
-    if not select_state(session, state):
+# Main scraping function
+def scrape(state, county, start_date, end_date, output_folder, results_file="search_results.csv", session_pool=None):
+    # Finished work from earlier runs into this output folder is skipped
+    os.makedirs(output_folder, exist_ok=True)
+    checkpoint = CheckpointStore(os.path.join(output_folder, CHECKPOINT_FILE))
+    search_key = f"{state.upper()}|{county.upper()}|{start_date}|{end_date}"
+    # "always" and "revalidate" look at every page again, so only "missing" skips a
+    # finished search, and only while the finished documents here are still on disk
+    if (IMAGE_SYNC_MODE == "missing" and checkpoint.is_done("search", search_key)
+            and all(document_is_current(checkpoint, output_folder, document_id, page_count)
+                    for document_id, page_count in checkpoint.done_units("document"))):
+        run_log.info(f"Search {search_key} already finished, nothing to do.")
+        checkpoint.close()
         return
-    if not select_county(session, county):
+
+    ledger = FailureLedger(os.path.join(output_folder, FAILURE_LEDGER_FILE))
+    try:
+        with timing.profile(timing_path(output_folder)):
+            if session_pool is not None:
+                with session_pool.session() as session:
+                    session.failure_ledger = ledger
+                    run_search(session, state, county, start_date, end_date, output_folder, results_file, checkpoint, search_key)
+            else:
+                session = bootstrap_session(state, county)
+                if session is None:
+                    return
+                session.failure_ledger = ledger
+                run_search(session, state, county, start_date, end_date, output_folder, results_file, checkpoint, search_key)
+                run_log.info(f"Connections: {format_connection_stats(session)}")
+            store = image_store(output_folder)
+            if store is not None:
+                run_log.info(f"Image store: {format_store_stats(store)}")
+    finally:
+        # Make the files of this search durable before it is reported finished
+        default_sink.flush()
+        checkpoint.close()
+
+def timing_path(output_folder):
+    return os.path.join(output_folder, TIMING_FILE) if TIMING_FILE else None
+
+def run_search(session, state, county, start_date, end_date, output_folder, results_file, checkpoint, search_key):
+    with timing.stage("search"):
+        checkpoint.mark_started("search", search_key)
+
+        # The sink is opened once the first results page is in hand, and its results
+        # only replace an earlier run's once every results page has been read, so a
+        # search that fails leaves the last complete results in place
+        page = setup_search(session, state, county, start_date, end_date, stream=STREAM_RESULTS)
+        if not page:
+            return
+        sink = create_sink(OUTPUT_FORMAT, output_folder, state, county, results_file, SQLITE_FILE, search_key)
+        unfinished = None
+        try:
+            unfinished = scrape_search_pages(session, page, search_key, output_folder, start_date, end_date, checkpoint, sink)
+        finally:
+            sink.close(finished=unfinished is not None)
+
+        if unfinished is None:
+            return
+        if unfinished:
+            run_log.warning(f"{len(unfinished)} documents did not finish; rerun to resume them.")
+            if session.failure_ledger is not None:
+                for document_id in unfinished:
+                    session.failure_ledger.record("document", document_id, error="incomplete")
+        else:
+            checkpoint.mark_done("search", search_key)
+
+# Scrape the first results page and the ones after it. Results come
+# MAX_WINDOW_RESULTS to a page; the pages after the first are reached through the
+# pager's Next Page link until it is disabled. Returns the documents that did not
+# finish, or None when a results page could not be read.
+def scrape_search_pages(session, page, search_key, output_folder, start_date, end_date, checkpoint, sink):
+    unfinished = []
+    page_number = 1
+    while True:
+        page_unfinished, next_page, form_fields = scrape_results_page(
+            session, page, output_folder, start_date, end_date, checkpoint, sink)
+        if page_unfinished is None:
+            return None
+        unfinished += page_unfinished
+        if not next_page:
+            return unfinished
+        page_number += 1
+        results_log.info(f"Moving to results page {page_number}")
+        page = fetch_next_results_page(session, next_page, form_fields, stream=STREAM_RESULTS)
+        if not page:
+            record_failure(session, "results_page", f"{search_key}|{page_number}", "failed to load")
+            return None
+
+# Scrape one results page, given as a streamed response or as HTML. Returns the
+# documents that did not finish (None if the page could not be read), its Next Page
+# href and the hidden fields to post it with
+def scrape_results_page(session, page, output_folder, start_date, end_date, checkpoint, sink):
+    if STREAM_RESULTS:
+        parser = ResultRowStream()
+        with page:
+            unfinished = stream_results_and_download(session, page, output_folder, start_date, end_date, checkpoint, sink, parser)
+        return unfinished, parser.next_page, parser.hidden_fields
+    soup = make_soup(page)
+    unfinished = get_results_and_download(soup, session, output_folder, start_date, end_date, checkpoint, sink)
+    return unfinished, next_page_href(soup), hidden_input_fields(soup)
+
+# Colorado counties served by thecountyrecorder.com
+COLORADO_COUNTIES = [
+    ("COLORADO", "BACA"),
+    ("COLORADO", "CHEYENNE"),
+    ("COLORADO", "DOLORES"),
+    ("COLORADO", "HUERFANO"),
+    ("COLORADO", "KIOWA"),
+    ("COLORADO", "LINCOLN"),
+    ("COLORADO", "OURAY"),
+    ("COLORADO", "SAN JUAN"),
+    ("COLORADO", "SAN MIGUEL"),
+    ("COLORADO", "SEDGWICK"),
+    ("COLORADO", "TELLER"),
+    ("COLORADO", "WASHINGTON"),
+]
+
+# Scrape several (state, county) pairs at once. The selected state/county lives in
+# server-side session state, so every pair gets its own session (created inside
+# scrape) and its own output/<STATE>/<COUNTY> folder.
+def scrape_counties(targets, start_date, end_date, output_folder, max_workers=4, use_processes=False):
+    # Resolve every target up front so typos fail here rather than in a worker. A state
+    # the catalog has no counties for (its refresh failed) is passed through, and
+    # select_county looks its counties up on the site.
+    catalog = get_option_catalog({state.upper() for state, _ in targets})
+    resolved = []
+    for state, county in targets:
+        counties = catalog["counties"].get(state.upper())
+        if not counties or county.upper() in counties:
+            resolved.append((state, county))
+        else:
+            run_log.warning(f"County '{county}' not found in {state}, skipping it.")
+    targets = resolved
+
+    os.makedirs(output_folder, exist_ok=True)
+    with timing.profile(timing_path(output_folder)):
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=max_workers) as executor:
+            futures = {}
+            for state, county in targets:
+                county_folder = os.path.join(output_folder, state.upper(), county.upper())
+                futures[executor.submit(scrape, state, county, start_date, end_date, county_folder)] = (state, county)
+
+            progress = Progress("counties", total=len(futures))
+            for future in as_completed(futures):
+                state, county = futures[future]
+                try:
+                    future.result()
+                    run_log.info(f"Finished {county}, {state}")
+                except Exception as e:
+                    run_log.error(f"Scrape failed for {county}, {state}: {e}")
+                progress.advance()
+            progress.finish()
+
+# Largest result set one search window may return: a single page of 1000 rows
+MAX_WINDOW_RESULTS = 1000
+
+# Total documents found by a search, from the "Documents: N" item above the results
+def get_document_count(soup):
+    document_count_item = soup.find("li", class_="sce-listitem-inline")
+    if document_count_item is None:
+        return 0
+    return int(document_count_item.text.strip().split(":")[1].strip())
+
+def count_search_results(session, start, end):
+    search_page_html = setup_search(session, None, None, start.strftime("%m-%d-%Y"), end.strftime("%m-%d-%Y"))
+    if search_page_html is None:
+        return None
+    return get_document_count(make_soup(search_page_html))
+
+# Bisect [start, end] until every window holds at most max_results documents
+def split_date_window(session, start, end, max_results):
+    count = count_search_results(session, start, end)
+    search_log.info(f"{start:%m-%d-%Y} to {end:%m-%d-%Y}: {count} documents")
+    if count is None or count <= max_results or start == end:
+        if count is not None and count > max_results:
+            search_log.warning(f"Single day {start:%m-%d-%Y} has more than {max_results} documents; its results will be paged through.")
+        return [(start, end, count)]
+
+    middle = start + (end - start) // 2
+    return (split_date_window(session, start, middle, max_results)
+            + split_date_window(session, middle + timedelta(days=1), end, max_results))
+
+# Join neighbouring windows while their combined count still fits in one page
+def merge_date_windows(windows, max_results):
+    merged = []
+    for start, end, count in windows:
+        if merged and count is not None and merged[-1][2] is not None and merged[-1][2] + count <= max_results:
+            merged[-1] = (merged[-1][0], end, merged[-1][2] + count)
+        else:
+            merged.append((start, end, count))
+    return merged
+
+# Plan search windows for a date range, each small enough to come back as one page.
+# Dates use the MM-DD-YYYY format of the search form.
+def plan_date_windows(session, start_date, end_date, max_results=MAX_WINDOW_RESULTS):
+    start = datetime.strptime(start_date, "%m-%d-%Y").date()
+    end = datetime.strptime(end_date, "%m-%d-%Y").date()
+    windows = merge_date_windows(split_date_window(session, start, end, max_results), max_results)
+    return [(window_start.strftime("%m-%d-%Y"), window_end.strftime("%m-%d-%Y"), count)
+            for window_start, window_end, count in windows if count != 0]
+
+# Split a large search into single-page windows and scrape them in parallel. Each
+# window runs its own scrape (and session, since the search lives in server-side
+# session state) and writes search_results_<start>_<end>.csv into the same folder.
+def scrape_windows(state, county, start_date, end_date, output_folder, max_workers=4, max_results=MAX_WINDOW_RESULTS):
+    os.makedirs(output_folder, exist_ok=True)
+    with timing.profile(timing_path(output_folder)):
+        # Windows take warm sessions from a pool instead of bootstrapping one each
+        session_pool = SessionPool(state, county, size=max_workers)
+        try:
+            with session_pool.session() as session:
+                windows = plan_date_windows(session, start_date, end_date, max_results)
+            run_log.info(f"Planned {len(windows)} search windows")
+            session_pool.warm()
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(scrape, state, county, window_start, window_end, output_folder,
+                                           f"search_results_{window_start}_{window_end}.csv", session_pool)
+                           for window_start, window_end, _ in windows]
+                progress = Progress("search windows", total=len(futures))
+                for future in futures:
+                    future.result()
+                    progress.advance()
+                progress.finish()
+        finally:
+            session_pool.close()
+
+# ---------------------------------------------------------------------------
+# Async engine: the same select_state -> select_county -> accept_disclaimer ->
+# setup_search -> results -> documents -> images flow on aiohttp, with one shared
+# connection pool and cookie jar carrying the ASP.NET session
+# ---------------------------------------------------------------------------
+
+# Total connections kept by the async engine, and how many of them may go to one host
+ASYNC_CONNECTION_LIMIT = 100
+ASYNC_LIMIT_PER_HOST = 20
+# Documents processed at once by the async engine
+ASYNC_DOCUMENT_LIMIT = 50
+
+# Slot of the host's adaptive limiter (the one TransportSession uses, see
+# rate_limit.py) around one aiohttp request, so the async engine is throttled and
+# backs off on 429/503 like the threaded one
+def async_host_slot(url):
+    return AsyncHostSlot(default_limiter.for_url(url) if transport.RATE_LIMIT else None)
+
+def report_to_slot(slot, response):
+    slot.status = response.status
+    slot.retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+# Every request of this flow (page loads, postbacks and images) is safe to repeat, so
+# transient failures are retried with the transport's policy. Returns the status and
+# the body as text, or whatever read(response) returns (read runs inside the retry,
+# so a body cut off halfway is fetched again)
+async def async_fetch(client, url, data=None, policy=default_policy, read=None):
+    method = "POST" if data is not None else "GET"
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            async with async_host_slot(url) as slot, client.request(method, url, data=data) as response:
+                report_to_slot(slot, response)
+                if policy.retries_status(response.status) and policy.can_retry(method, attempt, idempotent=True):
+                    retry_after = response.headers.get("Retry-After")
+                else:
+                    return response.status, await (read(response) if read is not None else response.text())
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError):
+            if not policy.can_retry(method, attempt, idempotent=True):
+                raise
+            retry_after = None
+        await asyncio.sleep(policy.delay(attempt, parse_retry_after(retry_after)))
+
+# Post one of the home page dropdowns (states or counties) like select_state/select_county
+async def async_select_option(client, dropdown_id, field_name, label, value_text):
+    status, html = await async_fetch(client, BASE_URL)
+    if status != 200:
+        return False
+
+    soup = make_soup(html)
+    viewstate = soup.find("input", {"name": "__VIEWSTATE"})["value"]
+    eventvalidation = soup.find("input", {"name": "__EVENTVALIDATION"})["value"]
+
+    dropdown = soup.find("select", {"id": dropdown_id})
+    option_value = None
+    for option in dropdown.find_all("option"):
+        if option.text.strip().upper() == value_text.upper():
+            option_value = option['value']
+            break
+
+    if not option_value:
+        bootstrap_log.warning(f"{label} '{value_text}' not found!")
+        return False
+
+    form_data = {
+        "__VIEWSTATE": viewstate,
+        "__EVENTVALIDATION": eventvalidation,
+        field_name: option_value,
+        "ctl00$ctl00$MainContent$searchMainContent$ctl01$ctl00$btnChangeCounty": "Go"
+    }
+    status, _ = await async_fetch(client, BASE_URL, data=form_data)
+    if status == 200:
+        bootstrap_log.debug(f"{label} '{value_text}' selected successfully.")
+        return True
+    bootstrap_log.error(f"Failed to select {label.lower()}.")
+    return False
+
+async def async_accept_disclaimer(client):
+    status, html = await async_fetch(client, f"{BASE_URL}/Disclaimer.aspx?RU=%2FIntroduction.aspx")
+    if status != 200:
+        return False
+
+    form_action = make_soup(html).find("form")["action"]
+    form_data = {
+        "ctl00$ctl00$MainContent$searchMainContent$ctl01$btnAccept": "Yes, I Accept"
+    }
+    status, _ = await async_fetch(client, f"{BASE_URL}{form_action}", data=form_data)
+    if status == 200:
+        bootstrap_log.debug("Disclaimer accepted.")
+        return True
+    bootstrap_log.error("Failed to accept disclaimer.")
+    return False
+
+async def async_setup_search(client, start_date, end_date):
+    search_url = f"{BASE_URL}/Search.aspx"
+    status, html = await async_fetch(client, search_url)
+    if status != 200:
+        search_log.error("Failed to load search page.")
+        return None
+
+    soup = make_soup(html)
+    form_data = {
+        "__VIEWSTATE": soup.find("input", {"name": "__VIEWSTATE"})["value"],
+        "__EVENTVALIDATION": soup.find("input", {"name": "__EVENTVALIDATION"})["value"],
+        "ctl00$ctl00$MainContent$searchMainContent$ctl00$cboDocumentType": "365|LIEN",
+        "ctl00$ctl00$MainContent$searchMainContent$ctl00$tbDateStart": start_date,
+        "ctl00$ctl00$MainContent$searchMainContent$ctl00$tbDateEnd": end_date,
+        "ctl00$ctl00$MainContent$searchMainContent$ctl00$cboResultItemsPerPage": "6|1000",  # Select 1000 results per page
+        "ctl00$ctl00$MainContent$searchMainContent$ctl00$btnSearchDocuments": "Execute Search"
+    }
+    status, html = await async_fetch(client, search_url, data=form_data)
+    if status == 200:
+        search_log.info("Search executed successfully.")
+        return html
+    search_log.error("Failed to execute search.")
+    return None
+
+# Same request as fetch_next_results_page, on the async client
+async def async_fetch_next_results_page(client, href, form_fields):
+    match = POSTBACK_LINK.search(href)
+    if match is None:
+        status, html = await async_fetch(client, f"{BASE_URL}/{href}")
+    else:
+        form_data = {**form_fields, "__EVENTTARGET": match.group(1), "__EVENTARGUMENT": match.group(2)}
+        status, html = await async_fetch(client, f"{BASE_URL}/Search.aspx", data=form_data)
+    if status != 200:
+        search_log.error(f"Failed to load the next results page ({status}).")
+        return None
+    return html
+
+# A page that still fails after retrying is logged to the ledger and left for the next run
+async def async_download_image_page(client, document_id, x_value, page_num, doc_folder, ledger=None):
+    try:
+        return await async_fetch_image_page(client, document_id, x_value, page_num, doc_folder)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        image_log.warning(f"Failed to download page {page_num} of document {document_id}: {error!r}")
+        record_to_ledger(ledger, "image", f"{document_id}|{page_num}", error)
+        return None
+
+async def async_fetch_image_page(client, document_id, x_value, page_num, doc_folder):
+    image_page_url = f"{BASE_URL}/Image.aspx?{x_value}&PN={page_num}"
+    status, html = await async_fetch(client, image_page_url)
+    if status != 200:
+        image_log.warning(f"Failed to load image page {image_page_url}")
+        return None
+
+    image_tag = make_soup(html).find("img", {"id": "MainContent_searchMainContent_ctl00_Image2"})
+    if not image_tag or "src" not in image_tag.attrs:
+        image_log.warning(f"No image found on page {page_num}")
+        return None
+
+    image_url = f"{BASE_URL}/{image_tag['src']}"
+    file_name = os.path.join(doc_folder, f"{document_id}_page_{page_num}.jpg")
+
+    async def save_image(image_response):
+        if image_response.status != 200 or 'image' not in image_response.headers.get('Content-Type', ''):
+            return None
+        # Written through the file sink (temp file, then rename) like the threaded
+        # engine's pages, so an interrupted run never leaves a truncated JPEG behind
+        chunks = [chunk async for chunk in image_response.content.iter_chunked(CHUNK_SIZE)]
+        await asyncio.to_thread(default_sink.write_chunks, chunks, file_name)
+        image_log.debug("Downloaded %s", file_name)
+        return file_name
+
+    _, saved = await async_fetch(client, image_url, read=save_image)
+    if saved is None:
+        image_log.warning(f"Failed to download image from {image_url} or received non-image content.")
+    return saved
+
+async def async_download_images(client, document_id, link, page_count, output_folder, ledger=None):
+    x_value = link.split("?")[-1]
+    doc_folder = os.path.join(output_folder, document_id)
+    os.makedirs(doc_folder, exist_ok=True)
+    return await asyncio.gather(*(async_download_image_page(client, document_id, x_value, page_num, doc_folder, ledger)
+                                  for page_num in range(1, page_count + 1)))
+
+# A document whose requests still fail after retrying costs only that document
+async def async_process_document(client, record, output_folder, document_slots, progress, ledger=None):
+    try:
+        return await async_fetch_document(client, record, output_folder, document_slots, ledger)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        document_log.warning(f"Failed to fetch document {record['document_id']}: {error!r}")
+        record_to_ledger(ledger, "document", record["document_id"], error)
+        return "N/A"
+    finally:
+        progress.advance()
+
+async def async_fetch_document(client, record, output_folder, document_slots, ledger=None):
+    document_link = record["document_link"]
+    if not document_link:
+        return "N/A"
+
+    async with document_slots:
+        status, html = await async_fetch(client, f"{BASE_URL}/{document_link}")
+        if status != 200:
+            document_log.warning(f"Failed to load document page {BASE_URL}/{document_link}")
+            return "N/A"
+
+        # Parsing and the CSV writes are blocking work, keep them off the event loop
+        soup = await asyncio.to_thread(make_soup, html)
+        page_count = get_page_count(None, document_link, soup=soup)
+        await asyncio.to_thread(get_document_table_and_save, None, record["document_id"], output_folder, soup)
+
+        if page_count.isdigit():
+            await async_download_images(client, record["document_id"], document_link, int(page_count), output_folder, ledger)
+    return page_count
+
+# Returns None when the results page could not be read
+async def async_get_results_and_download(client, soup, output_folder, start_date, end_date, sink, ledger=None):
+    os.makedirs(output_folder, exist_ok=True)
+
+    rows = find_result_rows(soup)
+    if rows is None:
         return
-    if not accept_disclaimer(session):
+
+    dates = parse_search_dates(start_date, end_date)
+    if dates is None:
         return
-    
-    search_page_html = setup_search(session, state, county, start_date, end_date)
-    
-    if search_page_html:
-        soup = BeautifulSoup(search_page_html, 'html.parser')
-        get_results_and_download(soup, session,output_folder, start_date, end_date)
+    start_date_obj, end_date_obj = dates
+
+    records = [record for record in (parse_result_row(row) for row in rows) if record]
+    document_slots = asyncio.Semaphore(ASYNC_DOCUMENT_LIMIT)
+    progress = Progress("documents", total=len(records))
+    page_counts = await asyncio.gather(*(async_process_document(client, record, output_folder, document_slots, progress, ledger)
+                                         for record in records))
+    progress.finish()
+
+    for record, page_count in zip(records, page_counts):
+        if start_date_obj <= record["record_date_obj"] <= end_date_obj:
+            sink.write_result(record, page_count)
+    return page_counts
+
+async def async_scrape(state, county, start_date, end_date, output_folder):
+    if aiohttp is None:
+        raise RuntimeError("The async engine needs aiohttp (pip install aiohttp)")
+
+    ledger = FailureLedger(os.path.join(output_folder, FAILURE_LEDGER_FILE))
+
+    connector = aiohttp.TCPConnector(limit=ASYNC_CONNECTION_LIMIT, limit_per_host=ASYNC_LIMIT_PER_HOST)
+    # One cookie jar for the whole run so the ASP.NET_SessionId set while choosing the
+    # state/county and accepting the disclaimer is sent with every later request
+    async with aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.CookieJar()) as client:
+        if not await async_select_option(client, "MainContent_searchMainContent_ctl01_ctl00_cboStates",
+                                         "ctl00$ctl00$MainContent$searchMainContent$ctl01$ctl00$cboStates", "State", state):
+            return
+        if not await async_select_option(client, "MainContent_searchMainContent_ctl01_ctl00_cboCounties",
+                                         "ctl00$ctl00$MainContent$searchMainContent$ctl01$ctl00$cboCounties", "County", county):
+            return
+        if not await async_accept_disclaimer(client):
+            return
+
+        page_html = await async_setup_search(client, start_date, end_date)
+        if not page_html:
+            return
+
+        # The pages after the first are reached through the pager's Next Page link, as in
+        # run_search; the results only replace an earlier run's once every page was read
+        sink = CsvSink(output_folder, "search_results.csv")
+        finished = False
+        try:
+            page_number = 1
+            while True:
+                soup = make_soup(page_html)
+                if await async_get_results_and_download(client, soup, output_folder, start_date, end_date, sink, ledger) is None:
+                    break
+                next_page = next_page_href(soup)
+                if not next_page:
+                    finished = True
+                    break
+                page_number += 1
+                results_log.info(f"Moving to results page {page_number}")
+                page_html = await async_fetch_next_results_page(client, next_page, hidden_input_fields(soup))
+                if not page_html:
+                    record_to_ledger(ledger, "results_page", f"{state}|{county}|{start_date}|{end_date}|{page_number}", "failed to load")
+                    break
+        finally:
+            sink.close(finished=finished)
+
+# Only parse times are profiled here; aiohttp requests bypass the transport hooks
+def scrape_async(state, county, start_date, end_date, output_folder):
+    os.makedirs(output_folder, exist_ok=True)
+    try:
+        with timing.profile(timing_path(output_folder)):
+            asyncio.run(async_scrape(state, county, start_date, end_date, output_folder))
+    finally:
+        default_sink.flush()
 
 # User input
 def user_input():
@@ -0,0 +1,216 @@
+import codecs
+import os
+import time
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+
+import timing
+
+try:
+    import lxml  # noqa: F401  (only checked for, BeautifulSoup loads it)
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxHTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxHTMLParser
+    except ImportError:
+        SelectolaxHTMLParser = None
+
+# Parser used by make_soup. lxml is much faster than Python's html.parser on the
+# 1000-row results pages, so it is the default whenever it is installed.
+# Set SCRAPER_PARSER to "html.parser", "lxml" or "selectolax" to override.
+DEFAULT_BACKEND = "lxml" if lxml else "html.parser"
+PARSER_BACKEND = os.environ.get("SCRAPER_PARSER", DEFAULT_BACKEND)
+
+
+def available_backends():
+    backends = ["html.parser"]
+    if lxml:
+        backends.append("lxml")
+    if SelectolaxHTMLParser:
+        backends.append("selectolax")
+    return backends
+
+
+# Parse a page with the configured backend. Every backend returns an object with the
+# small part of the BeautifulSoup API the scrapers use (find, find_all, text,
+# get_text, attrs, tag["attr"], find_next)
+def make_soup(markup, backend=None):
+    backend = backend or PARSER_BACKEND
+    started = time.perf_counter()
+    if backend == "selectolax":
+        if SelectolaxHTMLParser is None:
+            raise RuntimeError("The selectolax parser backend needs selectolax (pip install selectolax)")
+        soup = SelectolaxNode(SelectolaxHTMLParser(markup).root)
+    else:
+        soup = BeautifulSoup(markup, backend)
+    timing.record_parse(backend, len(markup), time.perf_counter() - started)
+    return soup
+
+
+# Build a CSS selector from BeautifulSoup-style find() arguments. Classes are left
+# out and matched by _class_matches, which follows BeautifulSoup's rules
+def _css_selector(name, attrs, id, href):
+    attrs = {key: value for key, value in (attrs or {}).items() if key != "class"}
+    if id is not None:
+        attrs["id"] = id
+    if href is not None:
+        attrs["href"] = href
+
+    selector = name if isinstance(name, str) else "*"
+    for key, value in attrs.items():
+        if value is True:
+            selector += f"[{key}]"
+        else:
+            selector += f'[{key}="{value}"]'
+    return selector
+
+
+# One class name matches any element carrying it, a string with spaces has to match
+# the whole class attribute, and a list matches if any of its entries does
+def _class_matches(node, class_):
+    if class_ is None:
+        return True
+    actual = node.attributes.get("class") or ""
+    wanted = class_ if isinstance(class_, (list, tuple)) else [class_]
+    return any(cls == actual or (" " not in cls and cls in actual.split()) for cls in wanted)
+
+
+class SelectolaxNode:
+    """BeautifulSoup-like wrapper around a selectolax node."""
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    def attrs(self):
+        return self.node.attributes
+
+    @property
+    def text(self):
+        return self.node.text(deep=True)
+
+    def get_text(self, strip=False):
+        return self.node.text(deep=True, separator="", strip=strip)
+
+    def find_all(self, name=None, attrs=None, class_=None, id=None, href=None, text=None):
+        class_ = class_ if class_ is not None else (attrs or {}).get("class")
+        matches = []
+        for node in self.node.css(_css_selector(name, attrs, id, href)):
+            # css() also matches the node itself, BeautifulSoup only searches below it
+            if node.mem_id == self.node.mem_id or not _class_matches(node, class_):
+                continue
+            if text is not None and node.text(deep=True) != text:
+                continue
+            matches.append(SelectolaxNode(node))
+        return matches
+
+    def find(self, name=None, attrs=None, class_=None, id=None, href=None, text=None):
+        matches = self.find_all(name, attrs, class_=class_, id=id, href=href, text=text)
+        return matches[0] if matches else None
+
+    # Next element with the given tag name in document order, like Tag.find_next
+    def find_next(self, name):
+        current = self.node
+        while True:
+            if current.child is not None:
+                current = current.child
+            else:
+                while current is not None and current.next is None:
+                    current = current.parent
+                if current is None:
+                    return None
+                current = current.next
+            if current.tag == name:
+                return SelectolaxNode(current)
+
+    def __getitem__(self, key):
+        value = self.node.attributes[key]
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __str__(self):
+        return self.node.html
+
+
+# id of the results pager's Next Page link; it only has an href while more pages follow
+NEXT_PAGE_LINK_ID = "MainContent_searchMainContent_ctl00_lnkNextPage"
+
+
+# Incremental parser for thecountyrecorder.com results pages. Rows of the
+# table.Results grid come out as soon as their closing </tr> has been fed, each as a
+# list of (cell text, first link href) pairs. The page's hidden form fields and its
+# Next Page href (None on the last page) are kept for requesting the following page.
+class ResultRowStream(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.table_depth = 0
+        self.results_depth = None
+        self.row = None
+        self.cell = None
+        self.rows = []
+        self.hidden_fields = {}
+        self.next_page = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if tag == "table":
+            self.table_depth += 1
+            if self.results_depth is None and "Results" in classes:
+                self.results_depth = self.table_depth
+        elif tag == "tr" and self.results_depth is not None and "results-data-row" in classes:
+            self.row = []
+        elif tag == "td" and self.row is not None:
+            self.cell = [[], None]
+        elif tag == "input" and attrs.get("type") == "hidden" and attrs.get("name"):
+            self.hidden_fields[attrs["name"]] = attrs.get("value") or ""
+        elif tag == "a" and attrs.get("id") == NEXT_PAGE_LINK_ID:
+            self.next_page = attrs.get("href")
+        elif tag == "a" and self.cell is not None and self.cell[1] is None:
+            self.cell[1] = attrs.get("href")
+
+    def handle_endtag(self, tag):
+        if tag == "table":
+            if self.table_depth == self.results_depth:
+                self.results_depth = None
+            self.table_depth -= 1
+        elif tag == "td" and self.cell is not None:
+            self.row.append(("".join(self.cell[0]), self.cell[1]))
+            self.cell = None
+        elif tag == "tr" and self.row is not None:
+            self.rows.append(self.row)
+            self.row = None
+
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.cell[0].append(data)
+
+    def pop_rows(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+
+# Yield results rows while a streamed (stream=True) response is still arriving, so
+# the full page is never held as a tree and work on early rows can start right away.
+# Pass a ResultRowStream as parser to read the page's pager fields afterwards.
+def iter_result_rows(response, chunk_size=64 * 1024, parser=None):
+    parser = parser if parser is not None else ResultRowStream()
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    # Only the time spent parsing counts, not waiting for chunks or the caller
+    parse_seconds = 0.0
+    size = 0
+    for chunk in response.iter_content(chunk_size):
+        started = time.perf_counter()
+        parser.feed(decoder.decode(chunk))
+        parse_seconds += time.perf_counter() - started
+        size += len(chunk)
+        yield from parser.pop_rows()
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    timing.record_parse("stream", size, parse_seconds)
+    yield from parser.pop_rows()
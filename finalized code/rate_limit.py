@@ -0,0 +1,150 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Starting point and bounds for each host. Concurrency and request rate grow while
+# responses are fast and successful, and are cut back on 429/503, errors or slow replies.
+INITIAL_CONCURRENCY = 4
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 32
+INITIAL_RATE = 5.0       # requests per second
+MIN_RATE = 0.5
+MAX_RATE = 50.0
+SLOW_RESPONSE = 5.0      # seconds to first byte counted as a sign of overload
+BACKOFF_FACTOR = 0.5     # multiplicative decrease
+BACKOFF_STATUSES = (429, 503)
+# How often an async waiter for a concurrency slot looks again (async code cannot
+# wait on the threading condition the blocking callers are woken by)
+ASYNC_POLL_INTERVAL = 0.05
+
+
+# Token bucket plus an AIMD concurrency window for one host
+class HostLimiter:
+    def __init__(self, concurrency=INITIAL_CONCURRENCY, rate=INITIAL_RATE):
+        self.condition = threading.Condition()
+        self.concurrency = float(concurrency)
+        self.rate = float(rate)
+        self.tokens = 1.0
+        self.refilled_at = time.monotonic()
+        self.paused_until = 0.0
+        self.in_flight = 0
+        self.successes = 0
+
+    def _refill(self, now):
+        self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    # Take a slot if a request may start now: a concurrency slot is free, a token is
+    # available and no Retry-After pause is in effect. Otherwise returns how long to
+    # wait (None: until a request finishes). Called with the condition held.
+    def _try_acquire(self):
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.paused_until:
+            return False, self.paused_until - now
+        if self.in_flight >= int(self.concurrency):
+            return False, None
+        if self.tokens < 1.0:
+            return False, (1.0 - self.tokens) / self.rate
+        self.tokens -= 1.0
+        self.in_flight += 1
+        return True, None
+
+    # Block until a request may start
+    def acquire(self):
+        with self.condition:
+            while True:
+                acquired, wait = self._try_acquire()
+                if acquired:
+                    return
+                self.condition.wait(wait)
+
+    # acquire for coroutines: sleeps on the event loop instead of blocking it
+    async def acquire_async(self):
+        while True:
+            with self.condition:
+                acquired, wait = self._try_acquire()
+            if acquired:
+                return
+            await asyncio.sleep(ASYNC_POLL_INTERVAL if wait is None else wait)
+
+    # Report how a request went and adjust the limits. status is None for a request
+    # that raised (connection error, timeout)
+    def release(self, status, latency, retry_after=None):
+        with self.condition:
+            self.in_flight -= 1
+            if status is None or status in BACKOFF_STATUSES or latency > SLOW_RESPONSE:
+                self.concurrency = max(MIN_CONCURRENCY, self.concurrency * BACKOFF_FACTOR)
+                self.rate = max(MIN_RATE, self.rate * BACKOFF_FACTOR)
+                self.successes = 0
+                if retry_after:
+                    self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            else:
+                # Additive increase: one more slot (and a bit more rate) per window of
+                # successful requests
+                self.successes += 1
+                if self.successes >= int(self.concurrency):
+                    self.successes = 0
+                    self.concurrency = min(MAX_CONCURRENCY, self.concurrency + 1)
+                    self.rate = min(MAX_RATE, self.rate + 1.0)
+            self.condition.notify_all()
+
+    def snapshot(self):
+        with self.condition:
+            return {"concurrency": int(self.concurrency), "rate": round(self.rate, 2), "in_flight": self.in_flight}
+
+
+# async with block holding one of a host's slots for an aiohttp request. The caller
+# sets status (and retry_after) from the response; left at None, the request counts
+# as failed. limiter=None makes it a no-op.
+class AsyncHostSlot:
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.status = None
+        self.retry_after = None
+        self.started = None
+
+    async def __aenter__(self):
+        if self.limiter is not None:
+            await self.limiter.acquire_async()
+        self.started = time.monotonic()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.limiter is not None:
+            self.limiter.release(self.status, time.monotonic() - self.started, self.retry_after)
+
+
+# One HostLimiter per host, shared by every session that is given this limiter
+class RateLimiter:
+    def __init__(self, concurrency=INITIAL_CONCURRENCY, rate=INITIAL_RATE):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def for_host(self, host):
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostLimiter(self.concurrency, self.rate)
+            return self.hosts[host]
+
+    def for_url(self, url):
+        return self.for_host(urlsplit(url).netloc)
+
+    def snapshot(self):
+        with self.lock:
+            hosts = dict(self.hosts)
+        return {host: limiter.snapshot() for host, limiter in hosts.items()}
+
+
+def parse_retry_after(value):
+    # Only the delay-seconds form; HTTP dates are rare on these hosts
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+default_limiter = RateLimiter()
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Size the cache may grow to before the least recently used responses are evicted
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# Only responses worth replaying: successes and the EagleWeb search redirects
+CACHEABLE_STATUSES = (200, 301, 302, 303, 307, 308)
+
+# Headers whose presence means the caller wants the server's own answer (the
+# conditional GETs of IMAGE_SYNC_MODE = "revalidate")
+CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+
+# Methods answered from the cache while the live site is in use. POSTs (ASP.NET
+# postbacks, logins, searches) change the server-side session, so they always go
+# to the server and are only stored, for replay-only runs.
+READ_THROUGH_METHODS = ("GET", "HEAD")
+
+
+# On-disk cache of HTTP responses keyed by method + URL + form body + scope, for
+# re-running parsers over pages fetched before instead of requesting them from the
+# live site again. The scope names the server-side state a response depends on (the
+# selected state/county of a county recorder session), so the same URL fetched for
+# two counties is two entries. Each entry is a <key>.json (status, headers, url) next to a <key>.body file,
+# sharded into sub-folders by the first two characters of the key; file mtimes
+# track last use for LRU eviction.
+# In replay-only mode nothing goes to the network: a request that is not cached gets
+# a 504 response, like a proxy answering only-if-cached.
+class ResponseCache:
+    def __init__(self, directory, max_bytes=CACHE_MAX_BYTES, replay_only=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.replay_only = replay_only
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._entries())
+
+    def key(self, method, url, params=None, data=None, json_body=None, scope=None):
+        # Let requests encode the query string and body exactly as it would send them
+        prepared = requests.Request(method.upper(), url, params=params, data=data, json=json_body).prepare()
+        body = prepared.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        digest = hashlib.sha256(f"{prepared.method} {prepared.url}\n{scope or ''}\n".encode("utf-8"))
+        digest.update(body)
+        return digest.hexdigest()
+
+    def usable(self, kwargs):
+        headers = kwargs.get("headers") or {}
+        return not kwargs.get("files") and not any(name in headers for name in CONDITIONAL_HEADERS)
+
+    # Whether a cached response may stand in for sending the request
+    def serves(self, method):
+        return self.replay_only or method.upper() in READ_THROUGH_METHODS
+
+    def _paths(self, key):
+        folder = os.path.join(self.directory, key[:2])
+        return os.path.join(folder, f"{key}.json"), os.path.join(folder, f"{key}.body")
+
+    def get(self, key, request=None):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as file:
+                meta = json.load(file)
+            with open(body_path, "rb") as file:
+                content = file.read()
+        except (FileNotFoundError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        now = time.time()
+        os.utime(meta_path, (now, now))
+        with self.lock:
+            self.hits += 1
+        return build_response(meta["status"], meta["reason"], meta["headers"], meta["url"], content, request)
+
+    def put(self, key, response):
+        if response.status_code not in CACHEABLE_STATUSES:
+            return
+        body_temp = self._temp_path(self._paths(key)[1])
+        with open(body_temp, "wb") as file:
+            file.write(response.content)
+        self._commit(key, response, body_temp, len(response.content))
+
+    # Cache a stream=True response as the caller reads it, without buffering the body:
+    # its chunks are copied to a temp file that becomes the entry once the body has
+    # been read to the end. A body closed early is not cached.
+    def tee(self, key, response):
+        if response.status_code not in CACHEABLE_STATUSES:
+            return
+        body_temp = self._temp_path(self._paths(key)[1])
+        response.raw = CacheTee(response.raw, open(body_temp, "wb"),
+                                lambda size: self._commit(key, response, body_temp, size),
+                                lambda: os.remove(body_temp))
+
+    def _temp_path(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return f"{path}.{os.getpid()}-{threading.get_ident()}-{id(self)}.tmp"
+
+    # Body first and metadata last, each renamed into place, so a reader never sees an
+    # entry whose body is missing or half written
+    def _commit(self, key, response, body_temp, size):
+        meta = {
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "url": response.url,
+            "method": response.request.method if response.request is not None else None,
+        }
+        meta_path, body_path = self._paths(key)
+        os.replace(body_temp, body_path)
+        meta_temp = self._temp_path(meta_path)
+        with open(meta_temp, "wb") as file:
+            file.write(json.dumps(meta).encode("utf-8"))
+        os.replace(meta_temp, meta_path)
+
+        with self.lock:
+            self.total_bytes += size
+            over_budget = self.total_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def miss_response(self, url, request=None):
+        return build_response(504, "Not Cached", {"Content-Length": "0"}, url, b"", request)
+
+    # Drop least recently used entries until the cache is back under max_bytes
+    def evict(self):
+        with self.lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, _, size in entries)
+            for _, key, size in entries:
+                if total <= self.max_bytes:
+                    break
+                for path in self._paths(key):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+            self.total_bytes = total
+
+    # (last used, key, body size) for every complete entry
+    def _entries(self):
+        for folder in os.scandir(self.directory):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                key = entry.name[:-len(".json")]
+                try:
+                    size = os.path.getsize(self._paths(key)[1])
+                    yield entry.stat().st_mtime, key, size
+                except FileNotFoundError:
+                    continue
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "bytes": self.total_bytes}
+
+
+# Wraps a streamed response's raw body to copy every chunk the caller reads into the
+# cache; finish(size) runs when the body was read to the end, discard() otherwise
+class CacheTee:
+    def __init__(self, raw, file, finish, discard):
+        self.raw = raw
+        self.file = file
+        self.finish = finish
+        self.discard = discard
+        self.size = 0
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def stream(self, amt=2 ** 16, *args, **kwargs):
+        if hasattr(self.raw, "stream"):
+            chunks = self.raw.stream(amt, *args, **kwargs)
+        else:
+            # File-like bodies (the HTTP/2 adapter's) only have read
+            chunks = iter(lambda: self.raw.read(amt), b"")
+        for chunk in chunks:
+            self._write(chunk)
+            yield chunk
+        self._done(complete=True)
+
+    def read(self, amt=None, *args, **kwargs):
+        data = self.raw.read(amt, *args, **kwargs)
+        self._write(data)
+        if amt is None or not data:
+            self._done(complete=True)
+        return data
+
+    def close(self):
+        self._done(complete=False)
+        self.raw.close()
+
+    def _write(self, data):
+        if self.file is not None and data:
+            self.file.write(data)
+            self.size += len(data)
+
+    def _done(self, complete):
+        if self.file is None:
+            return
+        file, self.file = self.file, None
+        file.close()
+        if complete:
+            self.finish(self.size)
+        else:
+            self.discard()
+
+
+def build_response(status, reason, headers, url, content, request=None):
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers)
+    # The stored body is already decoded; drop headers describing the wire encoding
+    response.headers.pop("Content-Encoding", None)
+    response.headers.pop("Transfer-Encoding", None)
+    response.url = url
+    response.request = request
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response._content = content
+    response._content_consumed = True
+    response.from_cache = True
+    return response
+
+
+def format_cache_stats(cache):
+    stats = cache.stats()
+    return f"{stats['hits']} cache hits, {stats['misses']} misses, {stats['bytes'] / 1024 ** 2:.1f} MB cached"
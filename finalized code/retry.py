@@ -0,0 +1,68 @@
+import json
+import random
+import threading
+from datetime import datetime
+
+# Responses worth another try: throttling and transient server/gateway errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+# How often and how patiently a failed request is retried. Non-idempotent requests
+# (POST) are only retried when the caller marks them idempotent, as the ASP.NET
+# postbacks and EagleWeb searches are.
+class RetryPolicy:
+    def __init__(self, attempts=4, backoff=1.0, max_backoff=30.0, jitter=0.5, statuses=RETRY_STATUSES):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = statuses
+
+    def can_retry(self, method, attempt, idempotent=None):
+        if attempt >= self.attempts:
+            return False
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        return idempotent
+
+    def retries_status(self, status):
+        return status in self.statuses
+
+    # Exponential backoff with jitter, or the server's Retry-After when it sent one
+    def delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        base = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(base * (1 - self.jitter), base)
+
+
+default_policy = RetryPolicy()
+
+
+# JSON-lines record of requests (and documents) that still failed after retrying,
+# so a follow-up run can target just those instead of redoing the whole job
+class FailureLedger:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def record(self, kind, target, status=None, error=None, attempts=None, method=None):
+        entry = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "kind": kind,
+            "method": method,
+            "target": target,
+            "status": status,
+            "error": error,
+            "attempts": attempts,
+        }
+        with self.lock, open(self.path, mode='a', encoding='utf-8') as file:
+            file.write(json.dumps(entry) + "\n")
+
+    def entries(self):
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                return [json.loads(line) for line in file if line.strip()]
+        except FileNotFoundError:
+            return []
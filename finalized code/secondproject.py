@@ -1,5 +1,10 @@
-import requests
-from bs4 import BeautifulSoup
+import csv
+from parsers import make_soup
+from transport import create_session, format_connection_stats
+from retry import FailureLedger
+import timing
+from log import get_logger, Progress
+from file_sink import default_sink
 from urllib.parse import urljoin
 # Base URL
 BASE_URL = "https://yumacountyaz-recweb.tylerhost.net/recorder/"
@@ -7,8 +12,15 @@ LOGIN_URL = f"{BASE_URL}web/loginPOST.jsp"
 SEARCH_URL = f"{BASE_URL}eagleweb/docSearchPOST.jsp"
 DOCUMENT_URL = f"{BASE_URL}recorder/eagleweb/viewDoc.jsp"
 
+# Where the extracted document data (one row per document) is written
+RESULTS_FILE = "documents.csv"
+RESULT_FIELDS = ["Document URL", "Grantor", "Grantee", "Recording Date", "PDF URL"]
+
+# Per-document messages are DEBUG; SCRAPER_LOG_STAGES="eagleweb=DEBUG" shows them
+log = get_logger("eagleweb")
+
 # Create a session to persist login state
-session = requests.Session()
+session = create_session(failure_ledger=FailureLedger("failures.jsonl"))
 
 # Step 1: Log in as a guest user
 def login():
@@ -16,13 +28,13 @@ def login():
         "submit": "Public Login",
         "guest": "true",
     }
-    response = session.post(LOGIN_URL, data=login_data)
+    response = session.post(LOGIN_URL, data=login_data, idempotent=True)
     
     if response.status_code == 200:
-        print("Login successful")
+        log.info("Login successful")
     else:
-        print(f"Login failed with status code {response.status_code}")
-        print(response.text)  # To see the page content for debugging
+        log.error(f"Login failed with status code {response.status_code}")
+        log.debug("Login page: %s", response.text)  # To see the page content for debugging
         return False
     return True
 
@@ -59,16 +71,16 @@ def fetch_xhr_data(start_date, end_date):
     }
     # Send the XHR request
     
-    xhr_response = session.post(xhr_url, data=xhr_data)
+    xhr_response = session.post(xhr_url, data=xhr_data, idempotent=True)
 
     if xhr_response.status_code == 200:
         # Assuming the XHR response contains the requestId or a token
         data = xhr_response.json()  # Check the response format
         request_id = data.get("requestId")  # Extract the requestId from the response
-        print(f"Received requestId: {request_id}")
+        log.debug(f"Received requestId: {request_id}")
         return request_id
     else:
-        print(f"XHR request failed with status {xhr_response.status_code}")
+        log.error(f"XHR request failed with status {xhr_response.status_code}")
         return None
 
 # Step 2: Perform the search
@@ -83,7 +95,7 @@ def search_documents(start_date, end_date):
         "requestId": request_id  # Include the requestId from the XHR
     }
 
-    response = session.post(SEARCH_URL, data=search_data, allow_redirects=False)
+    response = session.post(SEARCH_URL, data=search_data, allow_redirects=False, idempotent=True)
 
     if response.status_code in [301, 302]:  # Redirect detected
         relative_redirect_url = response.headers.get("Location")  # Example: ../eagleweb/docSearchResults.jsp?searchId=1
@@ -93,37 +105,37 @@ def search_documents(start_date, end_date):
         # Extract searchId
         if "searchId=" in redirect_url:
             search_id = redirect_url.split("searchId=")[-1]
-            print(f"Extracted searchId: {search_id}")
+            log.debug(f"Extracted searchId: {search_id}")
         else:
-            print("Error: searchId not found in redirect URL.")
+            log.error("Error: searchId not found in redirect URL.")
             return None
 
         # Fetch search results
-        print(f"Redirecting to results: {redirect_url}")
+        log.debug(f"Redirecting to results: {redirect_url}")
         results_response = session.get(redirect_url)
 
         if results_response.status_code == 200:
-            print("Search results fetched successfully")
+            log.info("Search results fetched successfully")
             return results_response.text  # Return HTML of results page
         else:
-            print(f"Failed to fetch results: {results_response.status_code}")
+            log.error(f"Failed to fetch results: {results_response.status_code}")
             return None
     else:
-        print(f"Search failed with status code {response.status_code}")
+        log.error(f"Search failed with status code {response.status_code}")
         return None
 
 
     
 # Step 3: Parse search results and get document links
 def parse_search_results(search_html):
-    soup = BeautifulSoup(search_html, 'html.parser')
+    soup = make_soup(search_html)
     # print(soup)
     results = []
     # Looking for the table rows that contain clickable document links
     rows = soup.find_all('tr', {'class': 'clickable'})
-    print(rows)
+    log.debug("Result rows: %s", rows)
     if not rows:
-        print("No results found in the search page.")
+        log.warning("No results found in the search page.")
         return results
     
     for row in rows:
@@ -133,14 +145,14 @@ def parse_search_results(search_html):
             results.append(document_url)
     
     if not results:
-        print("No document links found.")
+        log.warning("No document links found.")
     return results
 
 # Step 4: Extract document details and download PDF
 def extract_document_data(doc_url):
     response = session.get(doc_url)
     if response.status_code == 200:
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = make_soup(response.text)
         
         # Extracting document details
         doc_details = {}
@@ -165,38 +177,58 @@ def extract_document_data(doc_url):
         
         return doc_details
     else:
-        print(f"Failed to fetch document data for {doc_url} with status code {response.status_code}")
+        log.warning(f"Failed to fetch document data for {doc_url} with status code {response.status_code}")
         return None
 
 # Step 5: Download PDF
 def download_pdf(pdf_url):
-    pdf_response = session.get(pdf_url)
-    if pdf_response.status_code == 200:
-        filename = pdf_url.split('/')[-1]
-        with open(filename, 'wb') as f:
-            f.write(pdf_response.content)
-        print(f"PDF downloaded: {filename}")
-    else:
-        print(f"Failed to download PDF: {pdf_url}")
+    with timing.stage("pdf"):
+        # Streamed to disk, so a large PDF is never held in memory whole
+        pdf_response = session.get(pdf_url, stream=True)
+        if pdf_response.status_code == 200:
+            filename = pdf_url.split('/')[-1]
+            default_sink.write_response(pdf_response, filename)
+            log.debug("PDF downloaded: %s", filename)
+        else:
+            pdf_response.close()
+            log.warning(f"Failed to download PDF: {pdf_url}")
 
 # Main function to run the scraper
 def main():
-    if login():  # Step 1: Login
-        search_html = search_documents("01/01/2024", "02/25/2024")  # Step 2: Search for documents
-        if search_html:
-            # After printing the HTML, you can proceed to parse it
-            document_links = parse_search_results(search_html)  # Step 3: Parse results and get links
-            if document_links:
-                for doc_url in document_links:
-                    doc_data = extract_document_data(doc_url)  # Step 4: Extract data for each document
-                    if doc_data:
-                        print(doc_data)  # You can save or process the data as needed
+    # Request and parse timings by stage go to request_timings.jsonl
+    with timing.profile("request_timings.jsonl"):
+        with timing.stage("bootstrap"):
+            logged_in = login()  # Step 1: Login
+        if logged_in:
+            with timing.stage("search"):
+                search_html = search_documents("01/01/2024", "02/25/2024")  # Step 2: Search for documents
+            if search_html:
+                # After printing the HTML, you can proceed to parse it
+                with timing.stage("search"):
+                    document_links = parse_search_results(search_html)  # Step 3: Parse results and get links
+                if document_links:
+                    progress = Progress("documents", total=len(document_links))
+                    written = 0
+                    with open(RESULTS_FILE, mode='w', newline='', encoding='utf-8') as file:
+                        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+                        writer.writeheader()
+                        for doc_url in document_links:
+                            with timing.stage("document_tables"):
+                                doc_data = extract_document_data(doc_url)  # Step 4: Extract data for each document
+                            if doc_data:
+                                log.debug("Document data: %s", doc_data)
+                                writer.writerow({"Document URL": doc_url, **doc_data})
+                                written += 1
+                            progress.advance()
+                    progress.finish()
+                    log.info(f"Wrote {written} documents to {RESULTS_FILE}")
+                else:
+                    log.warning("No document links found to process.")
             else:
-                print("No document links found to process.")
+                log.error("Failed to perform search.")
         else:
-            print("Failed to perform search.")
-    else:
-        print("Login failed. Exiting scraper.")
+            log.error("Login failed. Exiting scraper.")
+        log.info(f"Connections: {format_connection_stats(session)}")
 
 if __name__ == "__main__":
     main()
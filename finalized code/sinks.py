@@ -0,0 +1,349 @@
+import csv
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for OUTPUT_FORMAT = "parquet"
+    pa = None
+    pq = None
+
+RESULT_HEADERS = ["Item#", "Document ID#", "Recording Date", "Document Type", "Document Name", "Name Type", "Document", "Page Count"]
+
+# Rows buffered per dataset partition before they are written out as one Parquet row group
+ROW_GROUP_SIZE = 10000
+
+# SqliteSink commits buffered rows once SQLITE_BATCH_SIZE of them are waiting or the
+# oldest has waited SQLITE_FLUSH_INTERVAL seconds
+SQLITE_BATCH_SIZE = 500
+SQLITE_FLUSH_INTERVAL = 5.0
+
+
+def result_row(record, page_count):
+    return [record["item_number"], record["document_id"], record["recording_date"], record["document_type"],
+            record["document_name"], record["name_type"], record["document_link"], page_count]
+
+
+# Where search results and document tables go. CsvSink writes the original layout:
+# one results CSV per search and one CSV per table per document
+#   <output>/<results_file>
+#   <output>/<document id>/<document id>_<table id>.csv
+# results_file=None opens no results file (document tables only). The results are
+# written to <results_file>.part and replace the earlier file on close(); a run that
+# did not finish (finished=False) only leaves its rows when there is no earlier file.
+class CsvSink:
+    def __init__(self, output_folder, results_file=None):
+        self.output_folder = output_folder
+        self.lock = threading.Lock()
+        self.file = None
+        if results_file:
+            self.path = os.path.join(output_folder, results_file)
+            self.file = open(f"{self.path}.part", mode='w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(RESULT_HEADERS)
+
+    def write_result(self, record, page_count):
+        with self.lock:
+            self.writer.writerow(result_row(record, page_count))
+
+    def write_table(self, document_id, table_id, headers, rows, year=None):
+        doc_folder = os.path.join(self.output_folder, document_id)
+        os.makedirs(doc_folder, exist_ok=True)
+        with open(os.path.join(doc_folder, f"{document_id}_{table_id}.csv"), mode='w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(headers)
+            writer.writerows(rows)
+
+    def close(self, finished=True):
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.close()
+            self.file = None
+            if finished or not os.path.exists(self.path):
+                os.replace(f"{self.path}.part", self.path)
+            else:
+                os.remove(f"{self.path}.part")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(finished=exc_type is None)
+
+
+RESULT_SCHEMA = None
+TABLE_SCHEMA = None
+if pa is not None:
+    RESULT_SCHEMA = pa.schema([
+        ("item_number", pa.string()),
+        ("document_id", pa.string()),
+        ("recording_date", pa.string()),
+        ("record_date", pa.date32()),
+        ("document_type", pa.string()),
+        ("document_name", pa.string()),
+        ("name_type", pa.string()),
+        ("document_link", pa.string()),
+        ("page_count", pa.string()),
+    ])
+    # Tables differ in width (Table7 has six columns, most have one), so each row keeps
+    # its cells as a list; the column names are in the schema metadata of each dataset
+    TABLE_SCHEMA = pa.schema([
+        ("document_id", pa.string()),
+        ("row", pa.int32()),
+        ("cells", pa.list_(pa.string())),
+    ])
+
+
+# Appends search results and document tables to Hive-partitioned Parquet datasets,
+# one per kind of row, that pyarrow.dataset / DuckDB / Spark can scan as a whole:
+#   <root>/search_results/state=<S>/county=<C>/year=<Y>/<search id>-<run id>.parquet
+#   <root>/<table id>/state=<S>/county=<C>/year=<Y>/<search id>-<run id>.parquet
+# Rows are buffered per partition and written as row groups of row_group_size.
+# Every search and run writes its own parts, so searches into the same folder add
+# up. A rerun of a search writes all of its result rows again, so once it finishes
+# cleanly the result parts of its earlier runs are removed; table parts are kept,
+# since a resumed run only writes the documents that were not finished before.
+# The search id is a hash of search_key, or results_file's name without one.
+class ParquetSink:
+    def __init__(self, root, state, county, results_file="search_results.csv", search_key=None, row_group_size=ROW_GROUP_SIZE):
+        if pa is None:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+        self.root = root
+        self.state = partition_value(state)
+        self.county = partition_value(county)
+        self.search_key = search_key
+        if search_key:
+            self.name = hashlib.sha1(search_key.encode("utf-8")).hexdigest()[:12]
+        else:
+            self.name = os.path.splitext(results_file or "search_results")[0]
+        self.run_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.row_group_size = row_group_size
+        self.lock = threading.Lock()
+        self.buffers = {}
+        self.schemas = {}
+        self.writers = {}
+
+    def write_result(self, record, page_count):
+        row = {
+            "item_number": record["item_number"],
+            "document_id": record["document_id"],
+            "recording_date": record["recording_date"],
+            "record_date": record["record_date_obj"],
+            "document_type": record["document_type"],
+            "document_name": record["document_name"],
+            "name_type": record["name_type"],
+            "document_link": record["document_link"],
+            "page_count": page_count,
+        }
+        self._append(("search_results", record["record_date_obj"].year), RESULT_SCHEMA, [row])
+
+    def write_table(self, document_id, table_id, headers, rows, year=None):
+        if not rows:
+            return
+        schema = TABLE_SCHEMA.with_metadata({"headers": json.dumps(headers)})
+        self._append((table_id, year), schema, [{"document_id": document_id, "row": number, "cells": cells}
+                                                for number, cells in enumerate(rows)])
+
+    def _append(self, partition, schema, rows):
+        with self.lock:
+            # The first rows of a partition fix its schema (and table headers)
+            self.schemas.setdefault(partition, schema)
+            buffer = self.buffers.setdefault(partition, [])
+            buffer.extend(rows)
+            if len(buffer) >= self.row_group_size:
+                self._flush(partition)
+
+    def _flush(self, partition):
+        rows = self.buffers.pop(partition, None)
+        if not rows:
+            return
+        writer = self.writers.get(partition)
+        if writer is None:
+            schema = self.schemas[partition]
+            if self.search_key:
+                schema = schema.with_metadata({**(schema.metadata or {}), b"search_key": self.search_key.encode("utf-8")})
+            writer = pq.ParquetWriter(self._part_path(partition), schema, compression="zstd")
+            self.writers[partition] = writer
+        writer.write_table(pa.Table.from_pylist(rows, schema=writer.schema), row_group_size=self.row_group_size)
+
+    def _part_path(self, partition):
+        dataset, year = partition
+        folder = os.path.join(self.root, dataset, f"state={self.state}", f"county={self.county}",
+                              f"year={year if year is not None else 'unknown'}")
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, f"{self.name}-{self.run_id}.parquet")
+
+    # finished=False (not every results page was read) keeps the earlier runs'
+    # results, since this run's are incomplete
+    def close(self, finished=True):
+        with self.lock:
+            if self.writers is None:
+                return
+            for partition in list(self.buffers):
+                self._flush(partition)
+            for writer in self.writers.values():
+                writer.close()
+            self.writers = None
+            if finished and self.search_key:
+                self._remove_earlier_results()
+
+    def _remove_earlier_results(self):
+        pattern = os.path.join(self.root, "search_results", f"state={self.state}", f"county={self.county}",
+                               "year=*", f"{self.name}-*.parquet")
+        current = f"{self.name}-{self.run_id}.parquet"
+        for path in glob.glob(pattern):
+            if os.path.basename(path) != current:
+                os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(finished=exc_type is None)
+
+
+# Upserts search results and document tables into one SQLite database, so that
+# paginated, windowed, resumed and multi-county runs pointed at the same file
+# accumulate in place instead of rewriting CSVs. Results are keyed on the document
+# ID within its state/county (IDs like 2021-00001 repeat across counties) and
+# indexed by recording date and document type; table rows are kept as JSON arrays
+# of cells. Writes are buffered and committed in batches, one transaction each.
+# Safe to share between the scraper's worker threads; several sinks (windows,
+# processes) can write to the same file, waiting on each other's transactions.
+class SqliteSink:
+    def __init__(self, path, state, county, batch_size=SQLITE_BATCH_SIZE, flush_interval=SQLITE_FLUSH_INTERVAL):
+        self.path = path
+        self.state = (state or "").upper()
+        self.county = (county or "").upper()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.results = []
+        self.tables = []
+        self.oldest = None
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS search_results (
+                    state TEXT NOT NULL,
+                    county TEXT NOT NULL,
+                    document_id TEXT NOT NULL,
+                    item_number TEXT,
+                    recording_date TEXT,
+                    record_date TEXT,
+                    document_type TEXT,
+                    document_name TEXT,
+                    name_type TEXT,
+                    document_link TEXT,
+                    page_count TEXT,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (state, county, document_id)
+                );
+                CREATE INDEX IF NOT EXISTS search_results_record_date ON search_results (record_date);
+                CREATE INDEX IF NOT EXISTS search_results_document_type ON search_results (document_type);
+
+                CREATE TABLE IF NOT EXISTS document_tables (
+                    state TEXT NOT NULL,
+                    county TEXT NOT NULL,
+                    document_id TEXT NOT NULL,
+                    table_id TEXT NOT NULL,
+                    row INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    cells TEXT NOT NULL,
+                    PRIMARY KEY (state, county, document_id, table_id, row)
+                );
+            """)
+
+    def write_result(self, record, page_count):
+        row = (self.state, self.county, record["document_id"], record["item_number"], record["recording_date"],
+               record["record_date_obj"].isoformat(), record["document_type"], record["document_name"],
+               record["name_type"], record["document_link"], page_count, datetime.now().isoformat(timespec="seconds"))
+        self._append(self.results, row)
+
+    def write_table(self, document_id, table_id, headers, rows, year=None):
+        self._append(self.tables, (document_id, table_id, json.dumps(headers), [json.dumps(cells) for cells in rows]))
+
+    def _append(self, buffer, item):
+        with self.lock:
+            buffer.append(item)
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+            if len(self.results) + len(self.tables) >= self.batch_size or time.monotonic() - self.oldest >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        results, self.results = self.results, []
+        tables, self.tables = self.tables, []
+        self.oldest = None
+        if not results and not tables:
+            return
+        with self.connection:
+            self.connection.executemany("""
+                INSERT INTO search_results (state, county, document_id, item_number, recording_date, record_date,
+                                            document_type, document_name, name_type, document_link, page_count, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (state, county, document_id) DO UPDATE SET
+                    item_number = excluded.item_number,
+                    recording_date = excluded.recording_date,
+                    record_date = excluded.record_date,
+                    document_type = excluded.document_type,
+                    document_name = excluded.document_name,
+                    name_type = excluded.name_type,
+                    document_link = excluded.document_link,
+                    page_count = excluded.page_count,
+                    updated_at = excluded.updated_at
+            """, results)
+            # A table that was scraped again replaces all of its earlier rows
+            for document_id, table_id, headers, rows in tables:
+                self.connection.execute(
+                    "DELETE FROM document_tables WHERE state = ? AND county = ? AND document_id = ? AND table_id = ?",
+                    (self.state, self.county, document_id, table_id),
+                )
+                self.connection.executemany(
+                    "INSERT INTO document_tables (state, county, document_id, table_id, row, headers, cells) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(self.state, self.county, document_id, table_id, number, headers, cells) for number, cells in enumerate(rows)],
+                )
+
+    # Rows are upserted, so an unfinished run (finished=False) never removes earlier ones
+    def close(self, finished=True):
+        with self.lock:
+            if self.connection is None:
+                return
+            self._flush()
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def partition_value(value):
+    return (value or "unknown").strip().upper().replace("/", "_").replace(" ", "_")
+
+
+# Sink for OUTPUT_FORMAT "csv", "parquet" or "sqlite". Parquet datasets go under
+# <output>/parquet; the SQLite database is sqlite_file inside the output folder, or
+# wherever sqlite_file points if it is an absolute path (one database for all counties)
+def create_sink(kind, output_folder, state=None, county=None, results_file="search_results.csv", sqlite_file="results.sqlite3",
+                search_key=None):
+    if kind == "csv":
+        return CsvSink(output_folder, results_file)
+    if kind == "parquet":
+        return ParquetSink(os.path.join(output_folder, "parquet"), state, county, results_file, search_key)
+    if kind == "sqlite":
+        return SqliteSink(os.path.join(output_folder, sqlite_file), state, county)
+    raise ValueError(f"Unknown output format: {kind}")
@@ -0,0 +1,393 @@
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from email.utils import formatdate
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds added to every response (plus up to LATENCY_JITTER of it at random), to
+# stand in for the round trip to the live sites
+LATENCY = 0.02
+LATENCY_JITTER = 0.5
+
+# Size of the synthetic county records: documents recorded per day and the most
+# image pages one document has
+DOCUMENTS_PER_DAY = 3
+MAX_PAGES = 4
+# Rows on one results page, like cboResultItemsPerPage "6|1000"
+RESULTS_PAGE_SIZE = 1000
+
+# Path the EagleWeb endpoints are served under (secondproject's BASE_URL ends in /recorder/)
+EAGLEWEB_PREFIX = "/recorder/"
+
+STATES = {
+    "COLORADO": ["BACA", "CHEYENNE", "DOLORES", "TELLER"],
+    "ARIZONA": ["YUMA"],
+}
+
+# Recorded pages and files the responses are built from
+RESULTS_FIXTURE = "samir.html"
+EAGLEWEB_FIXTURE = "search_results.html"
+PDF_FIXTURE = "document.pdf"
+IMAGE_FIXTURES = "output/*/*.jpg"
+
+
+def read_fixture(name, mode="r"):
+    with open(os.path.join(REPO_ROOT, name), mode, **({} if "b" in mode else {"encoding": "utf-8", "errors": "replace"})) as file:
+        return file.read()
+
+
+# ---------------------------------------------------------------------------
+# Synthetic records: every day holds DOCUMENTS_PER_DAY documents whose key (DK)
+# encodes the date, so any date range can be answered without storing anything
+# ---------------------------------------------------------------------------
+
+def documents_between(start, end):
+    documents = []
+    day = start
+    while day <= end:
+        for index in range(DOCUMENTS_PER_DAY):
+            documents.append(document_record(int(f"{day:%Y%m%d}{index:02d}")))
+        day += timedelta(days=1)
+    return documents
+
+
+def document_record(key):
+    day = datetime.strptime(str(key // 100), "%Y%m%d").date()
+    index = key % 100
+    ordinal = (day - date(day.year, 1, 1)).days * DOCUMENTS_PER_DAY + index + 1
+    return {
+        "key": key,
+        "id": f"{day.year}-{ordinal:05d}",
+        "date": day,
+        "time": f"09:{index:02d}:00 AM",
+        "type": "FEDERAL TAX LIEN",
+        "grantor": f"GRANTOR {ordinal}",
+        "grantee": "INTERNAL REVENUE SERVICE",
+        "pages": 1 + key % MAX_PAGES,
+    }
+
+
+def parse_date(value, formats=("%m-%d-%Y", "%m/%d/%Y")):
+    for date_format in formats:
+        try:
+            return datetime.strptime(value.strip(), date_format).date()
+        except (AttributeError, ValueError):
+            continue
+    return None
+
+
+# ---------------------------------------------------------------------------
+# ASP.NET county recorder pages (thecountyrecorder.com)
+# ---------------------------------------------------------------------------
+
+def hidden_fields(page):
+    token = hashlib.sha1(f"{page}{time.monotonic()}".encode()).hexdigest()
+    return (f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{page}:{token}" />'
+            f'<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{token}" />')
+
+
+def select(dropdown_id, options):
+    items = "".join(f'<option value="{value}">{escape(label)}</option>' for label, value in options)
+    return f'<select id="{dropdown_id}"><option value="">Select</option>{items}</select>'
+
+
+def aspnet_page(title, body, action):
+    return (f"<html><head><title>{title}</title></head><body>"
+            f'<form method="post" action="{action}" id="form1">{body}</form></body></html>')
+
+
+def home_page(state):
+    states = [(name.title(), f"{number}|{name}") for number, name in enumerate(STATES, 1)]
+    # The county list follows the session's state; without one (a client that drops
+    # the cookie) every county is listed
+    names = STATES.get(state) if state else [county for counties in STATES.values() for county in counties]
+    counties = [(county.title(), f"{number}|{county}") for number, county in enumerate(names, 1)]
+    return aspnet_page("County Recorder", hidden_fields("Default")
+                       + select("MainContent_searchMainContent_ctl01_ctl00_cboStates", states)
+                       + select("MainContent_searchMainContent_ctl01_ctl00_cboCounties", counties), "./")
+
+
+def disclaimer_page():
+    return aspnet_page("Disclaimer", hidden_fields("Disclaimer")
+                       + '<input type="submit" name="ctl00$ctl00$MainContent$searchMainContent$ctl01$btnAccept" value="Yes, I Accept" />',
+                       "/Disclaimer.aspx?RU=%2FIntroduction.aspx")
+
+
+def search_page():
+    return aspnet_page("Search", hidden_fields("Search")
+                       + '<input name="ctl00$ctl00$MainContent$searchMainContent$ctl00$tbDateStart" />'
+                       + '<input name="ctl00$ctl00$MainContent$searchMainContent$ctl00$tbDateEnd" />', "./Search.aspx")
+
+
+def result_row(number, document):
+    background = 2 if number % 2 else 1
+    return (f'<tr class="results-data-row listitem-background-color{background}" valign="top">'
+            f'<td align="center" class="results-data-cell">{number}</td>'
+            f'<td align="left" class="results-data-cell"><a class="sceAnchor" href="Document.aspx?DK={document["key"]}">{document["id"]}</a></td>'
+            f'<td align="left" class="results-data-cell">{document["date"]:%m-%d-%Y} {document["time"]}</td>'
+            f'<td align="left" class="results-data-cell">{document["type"]}</td>'
+            f'<td align="left" class="results-data-cell">{document["grantor"]}<br/>{document["grantee"]}<br/></td>'
+            f'<td align="left" class="results-data-cell">Grantor<br/>Grantee<br/></td></tr>')
+
+
+# The recorded results page (samir.html) with its rows and document count swapped for
+# the documents of the searched range, inside the page frame the scraper walks down.
+# Ranges longer than RESULTS_PAGE_SIZE get an enabled Next Page postback link; the
+# range and page go into __VIEWSTATE, as the real site keeps them in its view state.
+def results_page(start, end, page=1):
+    documents = documents_between(start, end) if start and end else []
+    first = (page - 1) * RESULTS_PAGE_SIZE
+    rows = "".join(result_row(number, document)
+                   for number, document in enumerate(documents[first:first + RESULTS_PAGE_SIZE], first + 1))
+    fixture = read_fixture(RESULTS_FIXTURE)
+    fixture = re.sub(r"Document Count: \d+", f"Document Count: {len(documents)}", fixture)
+    if first + RESULTS_PAGE_SIZE < len(documents):
+        fixture = fixture.replace(
+            '<a class="aspNetDisabled sceAnchor" id="MainContent_searchMainContent_ctl00_lnkNextPage">',
+            '<a class="sceAnchor" id="MainContent_searchMainContent_ctl00_lnkNextPage" '
+            'href="javascript:__doPostBack(&#39;ctl00$ctl00$MainContent$searchMainContent$ctl00$lnkNextPage&#39;,&#39;&#39;)">')
+    table_start = fixture.index('<tr class="results-data-row')
+    table_end = fixture.index("</table>", table_start)
+    fixture = fixture[:table_start] + rows + fixture[table_end:]
+    body = fixture[fixture.index("<body>") + len("<body>"):fixture.rindex("</body>")]
+    view_state = f"Results|{start.isoformat()}|{end.isoformat()}|{page}" if start and end else "Search"
+    return aspnet_page("Search Results", hidden_fields(view_state)
+                       + f'<table id="tableMain"><tr><td id="tableMain_Content">{body}</td></tr></table>', "./Search.aspx")
+
+
+def document_page(document):
+    tables = {
+        "Table7": [[document["id"], "", f'{document["date"]:%m-%d-%Y} {document["time"]}', document["type"],
+                    str(document["pages"]), "View Image"]],
+        "Table98": [[document["grantor"]], [document["grantee"]]],
+        "Table41": [["LOT 1 BLOCK 2"]],
+        "Table42": [[f"R{document['key']}"]],
+        "Table102": [["$13.00"]],
+    }
+    markup = "".join(f'<table id="{table_id}">' + "".join("<tr>" + "".join(f"<td>{escape(cell)}</td>" for cell in row) + "</tr>" for row in rows)
+                     + "</table>" for table_id, rows in tables.items())
+    return aspnet_page(f"Document {document['id']}", hidden_fields("Document") + markup
+                       + '<input type="submit" id="MainContent_searchMainContent_ctl00_btnViewImage" value="View Image" />'
+                       + f'<input type="text" id="MainContent_searchMainContent_ctl00_tbPageCount" value="{document["pages"]}" />',
+                       f"./Document.aspx?DK={document['key']}")
+
+
+def image_page(key, page_number):
+    return aspnet_page("Image", hidden_fields("Image")
+                       + f'<img id="MainContent_searchMainContent_ctl00_Image2" src="ImageHandler.ashx?DK={key}&amp;PN={page_number}" />',
+                       f"./Image.aspx?DK={key}&amp;PN={page_number}")
+
+
+# ---------------------------------------------------------------------------
+# EagleWeb pages (tylerhost.net recorder)
+# ---------------------------------------------------------------------------
+
+# The recorded search page with a results table of clickable rows added, as
+# docSearchResults.jsp renders it
+def eagleweb_results_page(start, end):
+    documents = documents_between(start, end) if start and end else []
+    rows = "".join(f'<tr class="clickable"><td><a href="eagleweb/viewDoc.jsp?node=DOC{document["key"]}">{document["id"]}</a></td>'
+                   f'<td>{document["type"]}</td><td>{document["date"]:%m/%d/%Y}</td></tr>' for document in documents)
+    fixture = read_fixture(EAGLEWEB_FIXTURE)
+    position = fixture.rindex("</body>")
+    return fixture[:position] + f'<table id="searchResultsTable">{rows}</table>' + fixture[position:]
+
+
+def eagleweb_document_page(document):
+    return ("<html><body>"
+            f'<span>Grantor:</span> <span>{document["grantor"]}</span>'
+            f'<span>Grantee:</span> <span>{document["grantee"]}</span>'
+            f'<span>Recording Date</span> <span>{document["date"]:%m/%d/%Y} {document["time"]}</span>'
+            f'<a href="eagleweb/downloads/DOC{document["key"]}.pdf">Download PDF</a>'
+            "</body></html>")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; without this Nagle holds the body
+        # back until the client's delayed ACK (about 40ms on every response)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        self.handle_request({})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8", errors="replace")
+        self.handle_request({name: values[-1] for name, values in parse_qs(body, keep_blank_values=True).items()})
+
+    def handle_request(self, form):
+        self.server.count_request()
+        if self.server.latency:
+            time.sleep(self.server.latency * (1 + random.uniform(0, LATENCY_JITTER)))
+
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            if url.path.startswith(EAGLEWEB_PREFIX):
+                self.route_eagleweb(url.path[len(EAGLEWEB_PREFIX):], query, form)
+            else:
+                self.route_aspnet(url.path.lstrip("/"), query, form)
+        except (KeyError, ValueError):
+            self.send_body(404, "text/html", b"<html><body>Not found</body></html>")
+
+    def session(self):
+        match = re.search(r"ASP\.NET_SessionId=(\w+)", self.headers.get("Cookie", ""))
+        if match:
+            return match.group(1), False
+        return hashlib.sha1(os.urandom(16)).hexdigest()[:24], True
+
+    def route_aspnet(self, path, query, form):
+        session_id, new_session = self.session()
+        state = self.server.session_states.get(session_id)
+        cookie = f"ASP.NET_SessionId={session_id}; path=/; HttpOnly" if new_session else None
+
+        if form and "__VIEWSTATE" not in form and path != "Disclaimer.aspx":
+            return self.send_body(500, "text/html", b"<html><body>Invalid postback or callback argument</body></html>")
+
+        if path in ("", "Default.aspx"):
+            state_field = "ctl00$ctl00$MainContent$searchMainContent$ctl01$ctl00$cboStates"
+            if form.get(state_field):
+                state = form[state_field].split("|")[-1]
+                self.server.session_states[session_id] = state
+            return self.send_html(home_page(state), cookie)
+        if path == "Disclaimer.aspx":
+            return self.send_html(disclaimer_page(), cookie)
+        if path == "Search.aspx":
+            if not form:
+                return self.send_html(search_page(), cookie)
+            if form.get("__EVENTTARGET", "").endswith("lnkNextPage"):
+                _, start, end, page = form["__VIEWSTATE"].split(":")[0].split("|")
+                return self.send_html(results_page(date.fromisoformat(start), date.fromisoformat(end), int(page) + 1), cookie)
+            start = parse_date(form.get("ctl00$ctl00$MainContent$searchMainContent$ctl00$tbDateStart"))
+            end = parse_date(form.get("ctl00$ctl00$MainContent$searchMainContent$ctl00$tbDateEnd"))
+            return self.send_html(results_page(start, end), cookie)
+        if path == "Document.aspx":
+            return self.send_html(document_page(document_record(int(query["DK"]))), cookie)
+        if path == "Image.aspx":
+            return self.send_html(image_page(int(query["DK"]), int(query["PN"])), cookie)
+        if path == "ImageHandler.ashx":
+            return self.send_image(int(query["DK"]), int(query["PN"]))
+        raise KeyError(path)
+
+    def route_eagleweb(self, path, query, form):
+        if path == "web/loginPOST.jsp":
+            return self.send_html("<html><body>Welcome, Public User</body></html>")
+        if path == "eagleweb/docSearch.jsp":
+            return self.send_html(read_fixture(EAGLEWEB_FIXTURE))
+        # secondproject resolves ajaxSearchInit.jsp against the /recorder/ base
+        if path in ("ajaxSearchInit.jsp", "eagleweb/ajaxSearchInit.jsp"):
+            return self.send_body(200, "application/json", json.dumps({"requestId": self.server.new_search(form)}).encode())
+        if path.startswith("eagleweb/docSearchPOST.jsp"):
+            search_id = self.server.new_search(form)
+            self.send_response(302)
+            self.send_header("Location", f"../eagleweb/docSearchResults.jsp?searchId={search_id}")
+            self.send_header("Content-Length", "0")
+            return self.end_headers()
+        if path == "eagleweb/docSearchResults.jsp":
+            search = self.server.searches[int(query["searchId"])]
+            return self.send_html(eagleweb_results_page(parse_date(search.get("RecordingDateIDStart")),
+                                                        parse_date(search.get("RecordingDateIDEnd"))))
+        if path == "eagleweb/viewDoc.jsp":
+            return self.send_html(eagleweb_document_page(document_record(int(query["node"][len("DOC"):]))))
+        if path.startswith("eagleweb/downloads/"):
+            return self.send_body(200, "application/pdf", self.server.pdf)
+        raise KeyError(path)
+
+    def send_image(self, key, page_number):
+        images = self.server.images
+        content = images[(key + page_number) % len(images)]
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            return self.end_headers()
+        self.send_body(200, "image/jpeg", content, {"ETag": etag, "Last-Modified": formatdate(self.server.started, usegmt=True)})
+
+    def send_html(self, markup, cookie=None):
+        self.send_body(200, "text/html; charset=utf-8", markup.encode("utf-8"), {"Set-Cookie": cookie} if cookie else None)
+
+    def send_body(self, status, content_type, content, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+# Local stand-in for thecountyrecorder.com and the EagleWeb recorder, answering from the
+# recorded fixtures in the repository root with LATENCY added to every response
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=LATENCY):
+        super().__init__(("127.0.0.1", port), StandInHandler)
+        self.latency = latency
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.session_states = {}
+        self.searches = {}
+        self.images = [read_fixture(path, "rb") for path in sorted(glob.glob(os.path.join(REPO_ROOT, IMAGE_FIXTURES)))[:20]]
+        self.pdf = read_fixture(PDF_FIXTURE, "rb")
+
+    def count_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def new_search(self, form):
+        with self.lock:
+            search_id = len(self.searches) + 1
+            self.searches[search_id] = form
+        return search_id
+
+    # BASE_URL for new copy.py
+    @property
+    def county_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    # BASE_URL for secondproject.py
+    @property
+    def eagleweb_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}{EAGLEWEB_PREFIX}"
+
+
+def start_server(port=0, latency=LATENCY):
+    server = StandInServer(port, latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(port=8080, latency=LATENCY):
+    server = StandInServer(port, latency)
+    print(f"County recorder: {server.county_url}")
+    print(f"EagleWeb:        {server.eagleweb_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8080, float(sys.argv[2]) if len(sys.argv) > 2 else LATENCY)
@@ -0,0 +1,240 @@
+import json
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+from log import get_logger
+
+# Per-thread state: the stage the thread is working on, and the timings of a
+# connection it opened for the request in flight
+local = threading.local()
+
+
+# Tag every request and parse made by this thread inside the block with a stage
+# (bootstrap, search, page_count, document_tables, image, ...)
+@contextmanager
+def stage(name):
+    previous = getattr(local, "stage", None)
+    local.stage = name
+    try:
+        yield
+    finally:
+        local.stage = previous
+
+
+def current_stage():
+    return getattr(local, "stage", None) or "other"
+
+
+def take_connection_timing():
+    timing = getattr(local, "connection", None)
+    local.connection = None
+    return timing
+
+
+# Collects one JSON line per request and per parse, plus per-stage totals for the
+# summary printed at the end of the run
+class Profiler:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, mode='w', encoding='utf-8')
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    def _stage_totals(self, name):
+        if name not in self.stages:
+            self.stages[name] = {"requests": 0, "new_connections": 0, "cached": 0, "bytes": 0, "seconds": 0.0,
+                                 "ttfb": [], "parses": 0, "parse_seconds": 0.0}
+        return self.stages[name]
+
+    def record_request(self, entry):
+        entry = {"time": datetime.now().isoformat(timespec="milliseconds"), "kind": "request", "stage": current_stage(), **entry}
+        with self.lock:
+            totals = self._stage_totals(entry["stage"])
+            totals["requests"] += 1
+            totals["bytes"] += entry.get("bytes") or 0
+            totals["seconds"] += entry.get("total") or 0.0
+            totals["new_connections"] += 1 if entry.get("connect") is not None else 0
+            totals["cached"] += 1 if entry.get("from_cache") else 0
+            if entry.get("ttfb") is not None:
+                totals["ttfb"].append(entry["ttfb"])
+            self.file.write(json.dumps(entry) + "\n")
+
+    def record_parse(self, backend, size, seconds):
+        entry = {"time": datetime.now().isoformat(timespec="milliseconds"), "kind": "parse", "stage": current_stage(),
+                 "backend": backend, "bytes": size, "seconds": round(seconds, 6)}
+        with self.lock:
+            totals = self._stage_totals(entry["stage"])
+            totals["parses"] += 1
+            totals["parse_seconds"] += seconds
+            self.file.write(json.dumps(entry) + "\n")
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+    def format_summary(self):
+        elapsed = time.perf_counter() - self.started
+        lines = [f"Timing profile ({elapsed:.1f}s wall, details in {self.path}):",
+                 f"  {'stage':<16}{'requests':>9}{'new conn':>9}{'cached':>8}{'MB':>9}{'req time':>10}{'ttfb p50':>10}{'ttfb p95':>10}{'parses':>8}{'parse time':>11}"]
+        with self.lock:
+            stages = sorted(self.stages.items(), key=lambda item: -item[1]["seconds"] - item[1]["parse_seconds"])
+            for name, totals in stages:
+                ttfb = sorted(totals["ttfb"])
+                p50 = f"{ttfb[len(ttfb) // 2] * 1000:.0f}ms" if ttfb else "-"
+                p95 = f"{ttfb[min(len(ttfb) - 1, int(len(ttfb) * 0.95))] * 1000:.0f}ms" if ttfb else "-"
+                lines.append(f"  {name:<16}{totals['requests']:>9}{totals['new_connections']:>9}{totals['cached']:>8}"
+                             f"{totals['bytes'] / 1024 ** 2:>9.2f}{totals['seconds']:>9.1f}s{p50:>10}{p95:>10}"
+                             f"{totals['parses']:>8}{totals['parse_seconds']:>10.2f}s")
+        return "\n".join(lines)
+
+
+active = None
+active_users = 0
+active_lock = threading.Lock()
+
+
+# Profile everything the process does inside the block, writing to path. Nested and
+# concurrent blocks (scrape_windows running scrape per window) share the outermost
+# profiler; the summary is printed when the last one exits. path=None disables it.
+@contextmanager
+def profile(path):
+    global active, active_users
+    if path is None:
+        yield None
+        return
+    with active_lock:
+        if active is None:
+            active = Profiler(path)
+        active_users += 1
+        profiler = active
+    try:
+        yield profiler
+    finally:
+        with active_lock:
+            active_users -= 1
+            finished = active_users == 0
+            if finished:
+                active = None
+        if finished:
+            profiler.close()
+            get_logger("timing").info(profiler.format_summary())
+
+
+def record_request(**entry):
+    profiler = active
+    if profiler is not None:
+        profiler.record_request(entry)
+
+
+def record_parse(backend, size, seconds):
+    profiler = active
+    if profiler is not None:
+        profiler.record_parse(backend, size, seconds)
+
+
+# ---------------------------------------------------------------------------
+# Connection timing: urllib3 connections that time DNS, TCP connect and the TLS
+# handshake and leave the result for the request that opened them
+# ---------------------------------------------------------------------------
+
+class TimedConnectionMixin:
+    def _new_conn(self):
+        host = self._dns_host
+        started = time.perf_counter()
+        try:
+            # Same lookup as urllib3's create_connection, IPv6 only where it is usable
+            addresses = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            # Let urllib3 resolve again and raise its usual NameResolutionError
+            return super()._new_conn()
+        resolved = time.perf_counter()
+
+        # Connect to the resolved addresses in order, so the lookup is not repeated.
+        # urllib3 raises NewConnectionError/ConnectTimeoutError (not OSError) for an
+        # address it cannot reach; the next one is tried, as create_connection would
+        error = None
+        for address in addresses:
+            self._dns_host = address[4][0]
+            try:
+                sock = super()._new_conn()
+                break
+            except (OSError, ConnectTimeoutError) as exc:
+                error = exc
+            finally:
+                self._dns_host = host
+        else:
+            raise error
+        local.connection = {"dns": resolved - started, "connect": time.perf_counter() - resolved, "tls": None}
+        return sock
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        timing = getattr(local, "connection", None)
+        if timing is not None and isinstance(self, HTTPSConnection):
+            timing["tls"] = max(time.perf_counter() - started - timing["dns"] - timing["connect"], 0.0)
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+TIMED_POOL_CLASSES = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+# Wraps a streamed response's raw body to count the bytes the caller reads and note
+# when the body is finished (read to the end or closed)
+class TimedBody:
+    def __init__(self, raw, finish):
+        self.raw = raw
+        self.finish = finish
+        self.size = 0
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def stream(self, amt=2 ** 16, *args, **kwargs):
+        if hasattr(self.raw, "stream"):
+            chunks = self.raw.stream(amt, *args, **kwargs)
+        else:
+            # File-like bodies (the HTTP/2 adapter's) only have read
+            chunks = iter(lambda: self.raw.read(amt), b"")
+        for chunk in chunks:
+            self.size += len(chunk)
+            yield chunk
+        self.done()
+
+    def read(self, *args, **kwargs):
+        data = self.raw.read(*args, **kwargs)
+        self.size += len(data)
+        return data
+
+    def close(self):
+        self.done()
+        self.raw.close()
+
+    def done(self):
+        if self.finish is not None:
+            finish, self.finish = self.finish, None
+            finish(self.size)
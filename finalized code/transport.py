@@ -0,0 +1,348 @@
+import io
+import threading
+import time
+from http.client import HTTPMessage
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from rate_limit import default_limiter, parse_retry_after
+from response_cache import ResponseCache, format_cache_stats
+from retry import default_policy
+import timing
+
+try:
+    import httpx
+except ImportError:  # only needed for HTTP/2
+    httpx = None
+
+# Hosts whose connection pools are kept, and connections kept open per host. Sized for
+# the document pipeline's detail and image workers all talking to one host at once.
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 32
+
+# Send requests over HTTP/2 (through httpx) where the server supports it
+HTTP2 = False
+
+# Throttle every session through the process-wide per-host limiter in rate_limit
+RATE_LIMIT = True
+
+# Seconds to wait for a connection or for the server to send data; without one a
+# stalled request would never reach the retry policy
+REQUEST_TIMEOUT = 60
+
+# Folder for the on-disk response cache (None = off). With RESPONSE_CACHE_REPLAY the
+# scrapers run from the cache alone and never touch the live site, e.g. to re-run
+# changed parsers over documents fetched before.
+RESPONSE_CACHE_DIR = None
+RESPONSE_CACHE_REPLAY = False
+
+
+# requests.Session with one sized, keep-alive connection pool per host, shared by
+# every flow (county recorder pages and images, EagleWeb pages and PDFs)
+class TransportSession(requests.Session):
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, http2=HTTP2, rate_limiter=None,
+                 retry_policy=None, failure_ledger=None, response_cache=None):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+        self.retry_policy = retry_policy
+        # retry.FailureLedger receiving requests that still failed after retrying
+        self.failure_ledger = failure_ledger
+        # Server-side state the responses depend on (e.g. "COLORADO|TELLER"), part of
+        # every response cache key
+        self.cache_scope = None
+        if http2:
+            adapter = HTTP2Adapter(max_connections=pool_maxsize)
+        else:
+            adapter = TimedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.headers["Connection"] = "keep-alive"
+        self.hooks["response"].append(mark_headers_received)
+
+    # idempotent=True lets the retry policy repeat a POST (ASP.NET postbacks and
+    # EagleWeb searches only read data, so repeating them is safe).
+    # tentative=True is for requests whose error status the caller handles itself
+    # (a postback with cached form tokens the server may reject): an error response
+    # is returned at once, without status retries or a failure ledger entry.
+    # Connection errors and timeouts are still retried.
+    def request(self, method, url, *args, idempotent=None, tentative=False, **kwargs):
+        cache = self.response_cache
+        if cache is None or args or not cache.usable(kwargs):
+            return self.send_with_retries(method, url, *args, idempotent=idempotent, tentative=tentative, **kwargs)
+
+        key = cache.key(method, url, kwargs.get("params"), kwargs.get("data"), kwargs.get("json"), self.cache_scope)
+        if cache.serves(method):
+            response = cache.get(key)
+            if response is None and cache.replay_only:
+                response = cache.miss_response(url)
+            if response is not None:
+                timing.record_request(method=method.upper(), url=url, status=response.status_code, from_cache=True,
+                                      bytes=len(response.content))
+                return response
+        response = self.send_with_retries(method, url, idempotent=idempotent, tentative=tentative, **kwargs)
+        if kwargs.get("stream"):
+            cache.tee(key, response)
+        else:
+            cache.put(key, response)
+        return response
+
+    def send_with_retries(self, method, url, *args, idempotent=None, tentative=False, **kwargs):
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        policy = self.retry_policy
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = self.send_limited(method, url, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if policy and policy.can_retry(method, attempt, idempotent):
+                    time.sleep(policy.delay(attempt))
+                    continue
+                self.record_failure(method, url, None, repr(error), attempt)
+                raise
+
+            if tentative:
+                return response
+            if policy and policy.retries_status(response.status_code) and policy.can_retry(method, attempt, idempotent):
+                response.close()
+                time.sleep(policy.delay(attempt, parse_retry_after(response.headers.get("Retry-After"))))
+                continue
+            if response.status_code >= 400:
+                self.record_failure(method, url, response.status_code, response.reason, attempt)
+            return response
+
+    def record_failure(self, method, url, status, error, attempts):
+        if self.failure_ledger is not None:
+            self.failure_ledger.record("request", url, status=status, error=error, attempts=attempts, method=method)
+
+    def send_limited(self, method, url, *args, **kwargs):
+        if self.rate_limiter is None:
+            return self.send_timed(method, url, *args, **kwargs)
+
+        # Wait for the host's limiter, then tell it how the request went so it can
+        # ramp up or back off
+        limiter = self.rate_limiter.for_url(url)
+        limiter.acquire()
+        started = time.monotonic()
+        response = None
+        try:
+            response = self.send_timed(method, url, *args, **kwargs)
+            return response
+        finally:
+            # Whatever happened, the slot goes back; a failed request counts as an error
+            if response is None:
+                limiter.release(None, time.monotonic() - started)
+            else:
+                limiter.release(response.status_code, time.monotonic() - started,
+                                parse_retry_after(response.headers.get("Retry-After")))
+
+    # Send one request, recording its timings while a timing.profile is active:
+    # DNS/connect/TLS (when it opened a connection), time to first byte, body
+    # transfer and size. A streamed body is recorded once the caller has read it.
+    def send_timed(self, method, url, *args, **kwargs):
+        if timing.active is None:
+            return super().request(method, url, *args, **kwargs)
+
+        entry = {"stage": timing.current_stage(), "method": method.upper(), "url": url}
+        timing.take_connection_timing()
+        started = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException as error:
+            timing.record_request(**entry, status=None, error=repr(error), total=round(time.perf_counter() - started, 6))
+            raise
+
+        connection = timing.take_connection_timing() or {}
+        headers_at = getattr(response, "headers_at", started + response.elapsed.total_seconds())
+        ttfb = response.elapsed.total_seconds() - (connection.get("dns") or 0) - (connection.get("connect") or 0) - (connection.get("tls") or 0)
+        entry.update(status=response.status_code, dns=connection.get("dns"), connect=connection.get("connect"),
+                     tls=connection.get("tls"), ttfb=max(ttfb, 0.0))
+
+        def finish(size):
+            finished = time.perf_counter()
+            entry.update(transfer=max(finished - headers_at, 0.0), total=finished - started, bytes=size)
+            timing.record_request(**{name: round(value, 6) if isinstance(value, float) else value for name, value in entry.items()})
+
+        if kwargs.get("stream"):
+            response.raw = timing.TimedBody(response.raw, finish)
+        else:
+            finish(len(response.content))
+        return response
+
+    # How many HTTP requests were sent and how many TCP/TLS connections that took;
+    # every request above the number of connections reused a kept-alive one
+    def connection_stats(self):
+        requests_sent = 0
+        connections_opened = 0
+        for adapter in set(self.adapters.values()):
+            stats = adapter.connection_stats() if hasattr(adapter, "connection_stats") else pool_stats(adapter)
+            requests_sent += stats["requests"]
+            connections_opened += stats["connections"]
+        return {
+            "requests": requests_sent,
+            "connections": connections_opened,
+            "reused": max(requests_sent - connections_opened, 0),
+        }
+
+
+# Response hook: requests runs it once the headers are in and before the body is read,
+# which splits a request's time into waiting (TTFB) and transfer
+def mark_headers_received(response, *args, **kwargs):
+    response.headers_at = time.perf_counter()
+
+
+# HTTPAdapter whose connections record DNS, connect and TLS times for timing
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = timing.TIMED_POOL_CLASSES
+
+
+def pool_stats(adapter):
+    requests_sent = 0
+    connections_opened = 0
+    pools = adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool is not None:
+            requests_sent += pool.num_requests
+            connections_opened += pool.num_connections
+    return {"requests": requests_sent, "connections": connections_opened}
+
+
+def create_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, http2=HTTP2, rate_limiter=None,
+                   retry_policy=default_policy, failure_ledger=None, response_cache=None):
+    if rate_limiter is None and RATE_LIMIT:
+        rate_limiter = default_limiter
+    if response_cache is None:
+        response_cache = shared_cache()
+    return TransportSession(pool_connections, pool_maxsize, http2, rate_limiter, retry_policy, failure_ledger,
+                            response_cache)
+
+
+shared = None
+shared_lock = threading.Lock()
+cache = None
+cache_lock = threading.Lock()
+
+
+# Process-wide ResponseCache when RESPONSE_CACHE_DIR is set, shared by every session
+def shared_cache():
+    global cache
+    if RESPONSE_CACHE_DIR is None:
+        return None
+    with cache_lock:
+        if cache is None:
+            cache = ResponseCache(RESPONSE_CACHE_DIR, replay_only=RESPONSE_CACHE_REPLAY)
+        return cache
+
+
+# Process-wide session for helpers that are not handed one (e.g. download_files)
+def shared_session():
+    global shared
+    with shared_lock:
+        if shared is None:
+            shared = create_session()
+        return shared
+
+
+def format_connection_stats(session):
+    stats = session.connection_stats()
+    summary = f"{stats['requests']} requests over {stats['connections']} connections ({stats['reused']} reused)"
+    if session.response_cache is not None:
+        summary += f", {format_cache_stats(session.response_cache)}"
+    return summary
+
+
+# File-like view of an httpx response body for requests.Response.raw
+class _HTTPXBody(io.RawIOBase):
+    def __init__(self, response):
+        self.response = response
+        self.chunks = response.iter_bytes()
+        self.buffer = b""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            try:
+                chunk = next(self.chunks, None)
+            except httpx.TransportError as error:
+                raise translate_httpx_error(error, None) from error
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if size < 0:
+            data, self.buffer = self.buffer, b""
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def close(self):
+        self.response.close()
+        super().close()
+
+
+# The requests exception for an httpx one, so the retry policy, failure ledger and
+# rate limiter treat HTTP/2 failures like HTTP/1.1 ones
+def translate_httpx_error(error, request):
+    if isinstance(error, httpx.ConnectTimeout):
+        return requests.ConnectTimeout(error, request=request)
+    if isinstance(error, httpx.TimeoutException):
+        return requests.ReadTimeout(error, request=request)
+    return requests.ConnectionError(error, request=request)
+
+
+# Transport adapter that sends requests.Session requests through an HTTP/2-capable
+# httpx client, so the scrapers keep using the requests API
+class HTTP2Adapter(BaseAdapter):
+    def __init__(self, max_connections=POOL_MAXSIZE):
+        super().__init__()
+        if httpx is None:
+            raise RuntimeError("HTTP/2 needs httpx with the http2 extra (pip install 'httpx[http2]')")
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.client = httpx.Client(http2=True, limits=limits, follow_redirects=False)
+        self.requests_sent = 0
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        httpx_request = self.client.build_request(request.method, request.url, headers=dict(request.headers),
+                                                  content=request.body, timeout=timeout)
+        try:
+            httpx_response = self.client.send(httpx_request, stream=True)
+        except httpx.TransportError as error:
+            raise translate_httpx_error(error, request) from error
+        self.requests_sent += 1
+
+        response = requests.Response()
+        response.status_code = httpx_response.status_code
+        response.headers = CaseInsensitiveDict(httpx_response.headers)
+        response.url = request.url
+        response.request = request
+        response.reason = httpx_response.reason_phrase
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.raw = _HTTPXBody(httpx_response)
+
+        # requests reads Set-Cookie from raw._original_response.msg to fill the
+        # session cookie jar (the ASP.NET session cookie depends on it)
+        message = HTTPMessage()
+        for name, value in httpx_response.headers.multi_items():
+            message[name] = value
+        response.raw._original_response = type("OriginalResponse", (), {"msg": message})()
+        requests.cookies.extract_cookies_to_jar(response.cookies, request, response.raw)
+
+        if not stream:
+            response.content  # noqa: B018  (read the body now, like HTTPAdapter)
+        return response
+
+    def connection_stats(self):
+        # httpx does not expose pool counters; one HTTP/2 connection per host carries
+        # every request to it
+        pool = getattr(getattr(self.client, "_transport", None), "_pool", None)
+        return {"requests": self.requests_sent, "connections": len(pool.connections) if pool is not None else 0}
+
+    def close(self):
+        self.client.close()
@@ -1,11 +1,22 @@
 import os
-import requests
 from bs4 import BeautifulSoup
 import csv
+import sys
 from datetime import datetime
 
+# log.py and transport.py live with the finalized scrapers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "finalized code"))
+from log import get_logger
+from transport import create_session, shared_session
+
 BASE_URL = "https://www.thecountyrecorder.com"
 
+# One logger per stage; their levels are set with SCRAPER_LOG_LEVEL/SCRAPER_LOG_STAGES (see log.py)
+bootstrap_log = get_logger("bootstrap")
+search_log = get_logger("search")
+results_log = get_logger("results")
+image_log = get_logger("image")
+
 # Function to select state
 def select_state(session, state):
     response = session.get(BASE_URL)
@@ -26,7 +37,7 @@ def select_state(session, state):
                 break
 
         if not state_value:
-            print(f"State '{state}' not found!")
+            bootstrap_log.warning(f"State '{state}' not found!")
             return False
 
         form_data = {
@@ -38,10 +49,10 @@ def select_state(session, state):
 
         post_response = session.post(BASE_URL, data=form_data)
         if post_response.status_code == 200:
-            print(f"State '{state}' selected successfully.")
+            bootstrap_log.debug(f"State '{state}' selected successfully.")
             return True
         else:
-            print("Failed to select state.")
+            bootstrap_log.error("Failed to select state.")
             return False
     return False
 
@@ -65,7 +76,7 @@ def select_county(session, county):
                 break
 
         if not county_value:
-            print(f"County '{county}' not found!")
+            bootstrap_log.warning(f"County '{county}' not found!")
             return False
 
         form_data = {
@@ -77,10 +88,10 @@ def select_county(session, county):
 
         post_response = session.post(BASE_URL, data=form_data)
         if post_response.status_code == 200:
-            print(f"County '{county}' selected successfully.")
+            bootstrap_log.debug(f"County '{county}' selected successfully.")
             return True
         else:
-            print("Failed to select county.")
+            bootstrap_log.error("Failed to select county.")
             return False
     return False
 
@@ -100,19 +111,19 @@ def accept_disclaimer(session):
 
         post_response = session.post(f"{BASE_URL}{form_action}", data=form_data)
         if post_response.status_code == 200:
-            print("Disclaimer accepted. Redirecting to search page...")
+            bootstrap_log.debug("Disclaimer accepted. Redirecting to search page...")
             
             # After accepting the disclaimer, we now follow the search link.
             search_url = f"{BASE_URL}/Search.aspx"
             response = session.get(search_url)
             if response.status_code == 200:
-                print("Search page loaded successfully.")
+                bootstrap_log.debug("Search page loaded successfully.")
                 return True
             else:
-                print("Failed to load search page.")
+                bootstrap_log.error("Failed to load search page.")
                 return False
         else:
-            print("Failed to accept disclaimer.")
+            bootstrap_log.error("Failed to accept disclaimer.")
             return False
     return False
 
@@ -122,7 +133,7 @@ def setup_search(session, state, county, start_date, end_date):
     
     response = session.get(search_url)
     if response.status_code != 200:
-        print("Failed to load search page.")
+        search_log.error("Failed to load search page.")
         return None
     
     soup = BeautifulSoup(response.text, 'html.parser')
@@ -145,38 +156,38 @@ def setup_search(session, state, county, start_date, end_date):
     
     response = session.post(search_url, data=form_data)
     if response.status_code == 200:
-        print("Search executed successfully.")
+        search_log.info("Search executed successfully.")
         return response.text
     else:
-        print("Failed to execute search.")
+        search_log.error("Failed to execute search.")
         return None
 
 # Function to parse results and download files
 def get_results_and_download(soup, output_folder, start_date, end_date):
-    print("Parsing search results...")
+    results_log.info("Parsing search results...")
 
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
 
     parent_table = soup.find("table", id="tableMain")
     if parent_table:
-        print("Parent table found")
+        results_log.debug("Parent table found")
 
         table_content = parent_table.find("td", id="tableMain_Content")
         if table_content:
-            print("Found tableMain_Content td")
+            results_log.debug("Found tableMain_Content td")
 
             main_div = table_content.find("div", class_="main")
             if main_div:
-                print("Found div.main")
+                results_log.debug("Found div.main")
 
                 print_results_div = main_div.find("div", id="PrintResults")
                 if print_results_div:
-                    print("Found PrintResults div")
+                    results_log.debug("Found PrintResults div")
 
                     results_table = print_results_div.find("table", class_="Results")
                     if results_table:
-                        print("Found results table")
+                        results_log.debug("Found results table")
                         rows = results_table.find_all("tr", class_=["results-data-row", "results-data-row listitem-background-color2", "results-data-row listitem-background-color1"])
 
                         # Convert start_date and end_date to datetime.date objects
@@ -184,7 +195,7 @@ def get_results_and_download(soup, output_folder, start_date, end_date):
                             start_date_obj = datetime.strptime(start_date, "%m-%d-%Y").date()
                             end_date_obj = datetime.strptime(end_date, "%m-%d-%Y").date()
                         except ValueError:
-                            print(f"Invalid date format for start_date or end_date. Please use MM-DD-YYYY.")
+                            results_log.error("Invalid date format for start_date or end_date. Please use MM-DD-YYYY.")
                             return
 
                         # Prepare to write results and image links
@@ -199,7 +210,7 @@ def get_results_and_download(soup, output_folder, start_date, end_date):
                                 for row in rows:
                                     cells = row.find_all("td")
                                     if len(cells) < 6:
-                                        print("Skipping row with insufficient columns")
+                                        results_log.debug("Skipping row with insufficient columns")
                                         continue
 
                                     item_number = cells[0].text.strip()
@@ -217,13 +228,13 @@ def get_results_and_download(soup, output_folder, start_date, end_date):
                                             # Try parsing without time
                                             record_date_obj = datetime.strptime(recording_date, "%m-%d-%Y").date()
                                         except ValueError:
-                                            print(f"Skipping invalid date: {recording_date}")
+                                            results_log.warning(f"Skipping invalid date: {recording_date}")
                                             continue  # Skip this row if both fail
 
                                     # Compare the record date with the start and end dates
                                     if start_date_obj <= record_date_obj <= end_date_obj:
                                         writer.writerow([item_number, document_id, recording_date, document_type, document_name, name_type])
-                                        print(f"Extracted: {item_number}, {document_id}, {recording_date}, {document_type}, {document_name}, {name_type}")
+                                        results_log.debug("Extracted: %s, %s, %s, %s, %s, %s", item_number, document_id, recording_date, document_type, document_name, name_type)
 
                                         # Check if an image is available and download it
                                         image_url = get_image_url(session, document_id, output_folder)
@@ -236,21 +247,22 @@ def get_results_and_download(soup, output_folder, start_date, end_date):
 def get_image_url(session, document_id, output_folder):
     download_all_pages(session, document_id, output_folder)
 
-# Function to download the image
+# Function to download the image. The shared transport session reuses pooled
+# keep-alive connections and brings the retry, timeout and rate limiting
 def download_image(image_url, document_id, output_folder):
-    print(f"Attempting to download image from {image_url}")
-    response = requests.get(image_url)
+    image_log.debug("Attempting to download image from %s", image_url)
+    response = shared_session().get(image_url)
     if response.status_code == 200:
         file_name = os.path.join(output_folder, f"{document_id}_image.jpg")
         with open(file_name, 'wb') as file:
             file.write(response.content)
-        print(f"Downloaded image {file_name}")
+        image_log.debug("Downloaded image %s", file_name)
     else:
-        print(f"Failed to download image from {image_url}")
+        image_log.warning(f"Failed to download image from {image_url}")
 
 # Main scraping function
 def scrape(state, county, start_date, end_date, output_folder):
-    session = requests.Session()
+    session = create_session()
 
     if not select_state(session, state):
         return
@@ -296,9 +308,9 @@ def download_all_pages(session, document_id, output_folder):
                         file_name = os.path.join(output_folder, f"{document_id}_page_{page_num}.jpg")
                         with open(file_name, 'wb') as file:
                             file.write(image_response.content)
-                        print(f"Downloaded {file_name}")
+                        image_log.debug("Downloaded %s", file_name)
                     else:
-                        print(f"Failed to download image from {image_url}")
+                        image_log.warning(f"Failed to download image from {image_url}")
                 
                 # Click next page if not the last page
                 if page_num < page_count:
@@ -308,7 +320,7 @@ def download_all_pages(session, document_id, output_folder):
                         response = session.get(image_page_url)
                         soup = BeautifulSoup(response.text, 'html.parser')
     else:
-        print(f"Failed to load image page for document {document_id}")
+        image_log.warning(f"Failed to load image page for document {document_id}")
 
 # Main entry point
 if __name__ == "__main__":
@@ -2,12 +2,25 @@ import os
 import requests
 from bs4 import BeautifulSoup
 import csv
+import sys
 from datetime import datetime
+
+# log.py lives with the finalized scrapers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "finalized code"))
+from log import get_logger
+
 session = requests.Session()
 session.cookies.clear()  # Clears any pre-existing cookies
 
 BASE_URL = "https://www.thecountyrecorder.com"
 
+# One logger per stage; their levels are set with SCRAPER_LOG_LEVEL/SCRAPER_LOG_STAGES (see log.py)
+bootstrap_log = get_logger("bootstrap")
+search_log = get_logger("search")
+results_log = get_logger("results")
+document_log = get_logger("document_tables")
+image_log = get_logger("image")
+
 # Function to select state
 def select_state(session, state):
     response = session.get(BASE_URL)
@@ -28,7 +41,7 @@ def select_state(session, state):
                 break
 
         if not state_value:
-            print(f"State '{state}' not found!")
+            bootstrap_log.warning(f"State '{state}' not found!")
             return False
 
         form_data = {
@@ -40,10 +53,10 @@ def select_state(session, state):
 
         post_response = session.post(BASE_URL, data=form_data)
         if post_response.status_code == 200:
-            print(f"State '{state}' selected successfully.")
+            bootstrap_log.debug(f"State '{state}' selected successfully.")
             return True
         else:
-            print("Failed to select state.")
+            bootstrap_log.error("Failed to select state.")
             return False
     return False
 
@@ -92,7 +105,7 @@ def select_county(session, county):
                 break
 
         if not county_value:
-            print(f"County '{county}' not found!")
+            bootstrap_log.warning(f"County '{county}' not found!")
             return False
         
         # Prepare the form data
@@ -112,10 +125,10 @@ def select_county(session, county):
         # Submit the form
         post_response = session.post(BASE_URL, data=form_data)
         if post_response.status_code == 200:
-            print(f"County '{county}' selected successfully.")
+            bootstrap_log.debug(f"County '{county}' selected successfully.")
             return True
         else:
-            print("Failed to select county.")
+            bootstrap_log.error("Failed to select county.")
             return False
     return False
 
@@ -135,19 +148,19 @@ def accept_disclaimer(session):
 
         post_response = session.post(f"{BASE_URL}{form_action}", data=form_data)
         if post_response.status_code == 200:
-            print("Disclaimer accepted. Redirecting to search page...")
+            bootstrap_log.debug("Disclaimer accepted. Redirecting to search page...")
             
             # After accepting the disclaimer, we now follow the search link.
             search_url = f"{BASE_URL}/Search.aspx"
             response = session.get(search_url)
             if response.status_code == 200:
-                print("Search page loaded successfully.")
+                bootstrap_log.debug("Search page loaded successfully.")
                 return True
             else:
-                print("Failed to load search page.")
+                bootstrap_log.error("Failed to load search page.")
                 return False
         else:
-            print("Failed to accept disclaimer.")
+            bootstrap_log.error("Failed to accept disclaimer.")
             return False
     return False
 
@@ -157,7 +170,7 @@ def setup_search(session, state, county, start_date, end_date):
     
     response = session.get(search_url)
     if response.status_code != 200:
-        print("Failed to load search page.")
+        search_log.error("Failed to load search page.")
         return None
     
     soup = BeautifulSoup(response.text, 'html.parser')
@@ -181,10 +194,10 @@ def setup_search(session, state, county, start_date, end_date):
     
     response = session.post(search_url, data=form_data)
     if response.status_code == 200:
-        print("Search executed successfully.")
+        search_log.info("Search executed successfully.")
         return response.text
     else:
-        print("Failed to execute search.")
+        search_log.error("Failed to execute search.")
         return None
 
 # # Function to parse results and download files
@@ -216,41 +229,41 @@ def download_images(session, document_id, link, page_count, output_folder):
                     with open(file_name, 'wb') as file:
                         for chunk in image_response.iter_content(1024):
                             file.write(chunk)
-                    print(f"Downloaded {file_name}")
+                    image_log.debug("Downloaded %s", file_name)
                 else:
-                    print(f"Failed to download image from {image_url} or received non-image content.")
+                    image_log.warning(f"Failed to download image from {image_url} or received non-image content.")
             else:
-                print(f"No image found on page {page_num}")
+                image_log.warning(f"No image found on page {page_num}")
         else:
-            print(f"Failed to load image page {image_page_url}")
+            image_log.warning(f"Failed to load image page {image_page_url}")
 
 
 def get_results_and_download(soup, output_folder, start_date, end_date):
-    print("Parsing search results...")
+    results_log.info("Parsing search results...")
 
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
 
     parent_table = soup.find("table", id="tableMain")
     if parent_table:
-        print("Parent table found")
+        results_log.debug("Parent table found")
 
         table_content = parent_table.find("td", id="tableMain_Content")
         if table_content:
-            print("Found tableMain_Content td")
+            results_log.debug("Found tableMain_Content td")
 
             main_div = table_content.find("div", class_="main")
             if main_div:
-                print("Found div.main")
-                print(main_div)
+                results_log.debug("Found div.main")
+                results_log.debug("div.main: %s", main_div)
                 print_results_div = main_div.find("div", id="PrintResults")
-                print(print_results_div)
+                results_log.debug("PrintResults: %s", print_results_div)
                 if print_results_div:
-                    print("Found PrintResults div")
+                    results_log.debug("Found PrintResults div")
 
                     results_table = print_results_div.find("table", class_="Results")
                     if results_table:
-                        print("Found results table")
+                        results_log.debug("Found results table")
                         rows = results_table.find_all("tr", class_=["results-data-row", "results-data-row listitem-background-color2", "results-data-row listitem-background-color1"])
 
                         # Convert start_date and end_date to datetime.date objects
@@ -258,7 +271,7 @@ def get_results_and_download(soup, output_folder, start_date, end_date):
                             start_date_obj = datetime.strptime(start_date, "%m-%d-%Y").date()
                             end_date_obj = datetime.strptime(end_date, "%m-%d-%Y").date()
                         except ValueError:
-                            print(f"Invalid date format for start_date or end_date. Please use MM-DD-YYYY.")
+                            results_log.error("Invalid date format for start_date or end_date. Please use MM-DD-YYYY.")
                             return
 
                         # Prepare to write results and image links
@@ -273,7 +286,7 @@ def get_results_and_download(soup, output_folder, start_date, end_date):
                             for row in rows:
                                 cells = row.find_all("td")
                                 if len(cells) < 6:
-                                    print("Skipping row with insufficient columns")
+                                    results_log.debug("Skipping row with insufficient columns")
                                     continue
 
                                 item_number = cells[0].text.strip()
@@ -298,24 +311,24 @@ def get_results_and_download(soup, output_folder, start_date, end_date):
                                         # Try parsing without time
                                         record_date_obj = datetime.strptime(recording_date, "%m-%d-%Y").date()
                                     except ValueError:
-                                        print(f"Skipping invalid date: {recording_date}")
+                                        results_log.warning(f"Skipping invalid date: {recording_date}")
                                         continue  # Skip this row if both fail
 
                                 # Compare the record date with the start and end dates
                                 if start_date_obj <= record_date_obj <= end_date_obj:
                                     writer.writerow([item_number, document_id, recording_date, document_type, document_name, name_type, document_link, page_count])
-                                    print(f"Extracted: {item_number}, {document_id}, {recording_date}, {document_type}, {document_name}, {name_type}, {document_link}, {page_count}")
+                                    results_log.debug("Extracted: %s, %s, %s, %s, %s, %s, %s, %s", item_number, document_id, recording_date, document_type, document_name, name_type, document_link, page_count)
                                 
                                 if document_link and page_count.isdigit():
                                         download_images(session, document_id, document_link, int(page_count), output_folder)
                     else:
-                        print("Results table not found inside PrintResults div.")
+                        results_log.warning("Results table not found inside PrintResults div.")
                 else:
-                    print("PrintResults div not found inside div.main.")
+                    results_log.warning("PrintResults div not found inside div.main.")
             else:
-                print("div.main not found inside tableMain_Content.")
+                results_log.warning("div.main not found inside tableMain_Content.")
         else:
-            print("tableMain_Content td not found.")
+            results_log.warning("tableMain_Content td not found.")
 
 
 def get_page_count(session, document_link):
@@ -329,13 +342,13 @@ def get_page_count(session, document_link):
         # Check for "View Image" button presence
         view_image_button = soup.find("input", id="MainContent_searchMainContent_ctl00_btnViewImage")
         if not view_image_button:
-            print("No 'View Image' button found. Skipping image extraction for this document.")
+            document_log.debug("No 'View Image' button found. Skipping image extraction for this document.")
             return "N/A"
 
         # Extract page count
         page_count_input = soup.find("input", id="MainContent_searchMainContent_ctl00_tbPageCount")
         if page_count_input and "value" in page_count_input.attrs:
-            print(f"Found page count input: {page_count_input['value']}")
+            document_log.debug("Found page count input: %s", page_count_input['value'])
             return page_count_input["value"].strip()
         
     return "N/A"
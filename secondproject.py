@@ -1,12 +1,26 @@
+import csv
+import os
+import sys
 import requests
 from bs4 import BeautifulSoup
 
+# log.py lives with the finalized scrapers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "finalized code"))
+from log import get_logger
+
 # Base URL
 BASE_URL = "https://yumacountyaz-recweb.tylerhost.net/recorder/"
 LOGIN_URL = f"{BASE_URL}web/loginPOST.jsp"
 SEARCH_URL = f"{BASE_URL}eagleweb/docSearch.jsp"
 SEARCH_RESULTS_URL = f"{BASE_URL}recorder/eagleweb/docSearchResults.jsp"
 
+# Where the extracted document data (one row per document) is written
+RESULTS_FILE = "documents.csv"
+RESULT_FIELDS = ["Document URL", "Grantor", "Grantee", "Recording Date", "PDF URL"]
+
+# Per-document messages are DEBUG; SCRAPER_LOG_STAGES="eagleweb=DEBUG" shows them
+log = get_logger("eagleweb")
+
 # Create a session to persist login state
 session = requests.Session()
 
@@ -19,10 +33,10 @@ def login():
     response = session.post(LOGIN_URL, data=login_data)
     
     if response.status_code == 200:
-        print("Login successful")
+        log.debug("Login successful")
     else:
-        print(f"Login failed with status code {response.status_code}")
-        print(response.text)  # To see the page content for debugging
+        log.error(f"Login failed with status code {response.status_code}")
+        log.debug("Login page: %s", response.text)  # To see the page content for debugging
         return False
     return True
 
@@ -31,7 +45,7 @@ def search_documents(start_date, end_date):
     # First, get the search page to extract any hidden fields or session parameters
     response = session.get(SEARCH_URL)
     if response.status_code != 200:
-        print(f"Failed to load search page with status code {response.status_code}")
+        log.error(f"Failed to load search page with status code {response.status_code}")
         return None
     
     # Parse the search page to get hidden form inputs (e.g., tokens, session data)
@@ -54,17 +68,17 @@ def search_documents(start_date, end_date):
     response = session.post(SEARCH_URL, data=form_data)
     
     if response.status_code == 200:
-        print("Search submitted successfully.")
+        log.info("Search submitted successfully.")
         # Check for the searchId in the response or redirect URL
         if "searchId=" in response.url:
             search_id = response.url.split("searchId=")[-1]
-            print(f"Redirected to results with searchId: {search_id}")
+            log.debug(f"Redirected to results with searchId: {search_id}")
             return search_id
         else:
-            print("Failed to retrieve searchId from redirect URL.")
+            log.error("Failed to retrieve searchId from redirect URL.")
             return None
     else:
-        print(f"Search failed with status code {response.status_code}")
+        log.error(f"Search failed with status code {response.status_code}")
         return None
 
 # Step 3: Fetch the search results page using the searchId
@@ -74,15 +88,14 @@ def fetch_search_results(search_id):
         response = session.get(results_url)
         
         if response.status_code == 200:
-            print("Successfully fetched search results page.")
-            print("HTML of the results page:")
-            print(response.text)  # Print the HTML content of the search results page
+            log.info("Successfully fetched search results page.")
+            log.debug("HTML of the results page: %s", response.text)
             return response.text
         else:
-            print(f"Failed to fetch results page with status code {response.status_code}")
+            log.error(f"Failed to fetch results page with status code {response.status_code}")
             return None
     else:
-        print("Invalid searchId. Cannot fetch results.")
+        log.error("Invalid searchId. Cannot fetch results.")
         return None
 
 # Step 4: Parse search results and get document links
@@ -93,7 +106,7 @@ def parse_search_results(search_html):
     # Looking for the table rows that contain clickable document links
     rows = soup.find_all('tr', {'class': 'clickable'})
     if not rows:
-        print("No results found in the search page.")
+        log.warning("No results found in the search page.")
         return results
     
     for row in rows:
@@ -103,7 +116,7 @@ def parse_search_results(search_html):
             results.append(document_url)
     
     if not results:
-        print("No document links found.")
+        log.warning("No document links found.")
     return results
 
 # Step 5: Extract document details and download PDF
@@ -135,7 +148,7 @@ def extract_document_data(doc_url):
         
         return doc_details
     else:
-        print(f"Failed to fetch document data for {doc_url} with status code {response.status_code}")
+        log.warning(f"Failed to fetch document data for {doc_url} with status code {response.status_code}")
         return None
 
 # Step 6: Download PDF
@@ -145,9 +158,9 @@ def download_pdf(pdf_url):
         filename = pdf_url.split('/')[-1]
         with open(filename, 'wb') as f:
             f.write(pdf_response.content)
-        print(f"PDF downloaded: {filename}")
+        log.debug("PDF downloaded: %s", filename)
     else:
-        print(f"Failed to download PDF: {pdf_url}")
+        log.warning(f"Failed to download PDF: {pdf_url}")
 
 # Main function to run the scraper
 def main():
@@ -159,18 +172,25 @@ def main():
                 # After printing the HTML, you can proceed to parse it
                 document_links = parse_search_results(search_html)  # Step 4: Parse results and get links
                 if document_links:
-                    for doc_url in document_links:
-                        doc_data = extract_document_data(doc_url)  # Step 5: Extract data for each document
-                        if doc_data:
-                            print(doc_data)  # You can save or process the data as needed
+                    written = 0
+                    with open(RESULTS_FILE, mode='w', newline='', encoding='utf-8') as file:
+                        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+                        writer.writeheader()
+                        for doc_url in document_links:
+                            doc_data = extract_document_data(doc_url)  # Step 5: Extract data for each document
+                            if doc_data:
+                                log.debug("Document data: %s", doc_data)
+                                writer.writerow({"Document URL": doc_url, **doc_data})
+                                written += 1
+                    log.info(f"Wrote {written} documents to {RESULTS_FILE}")
                 else:
-                    print("No document links found to process.")
+                    log.warning("No document links found to process.")
             else:
-                print("Failed to fetch search results page.")
+                log.error("Failed to fetch search results page.")
         else:
-            print("Failed to perform search.")
+            log.error("Failed to perform search.")
     else:
-        print("Login failed. Exiting scraper.")
+        log.error("Login failed. Exiting scraper.")
 
 if __name__ == "__main__":
     main()